@@ -0,0 +1,87 @@
+"""
+Bakes every fixed entity sprite into one packed texture atlas.
+
+    python atlas.py            # writes assets/atlas.png and assets/atlas.json
+
+The game loads the pair at startup with `sprites.load_atlas`, so the
+procedural drawing runs here once instead of on every launch. Sprites
+that depend on live state (the EMP ring, particles) are still baked on
+demand at runtime.
+"""
+import os
+import json
+import argparse
+
+import pygame
+
+ASSET_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets")
+ATLAS_IMAGE = os.path.join(ASSET_DIR, "atlas.png")
+ATLAS_INDEX = os.path.join(ASSET_DIR, "atlas.json")
+ATLAS_WIDTH = 512
+PADDING = 1
+
+def atlas_keys():
+    """Every sprite key the game asks for with fixed arguments."""
+    from enemy import ENEMY_TYPES
+    from powerup import POWERUP_LOOKS
+    from bullet import BULLET_TYPES
+    from player import Player
+    from boss import Boss # Importing it also registers the boss baker
+
+    keys = []
+    player = Player(600, 800)
+    # Tilt eases towards +-max_tilt and is drawn at whole degrees
+    for angle in range(-player.max_tilt, player.max_tilt + 1):
+        keys.append(('player', 'ship', (0, 200, 255), (player.width, player.height), angle))
+    keys.append(('player', 'shield', (100, 255, 100), (player.width + 20, player.height + 20), 0))
+    for kind in ENEMY_TYPES.values():
+        keys.append(('enemy', kind.look, kind.color, (kind.width, kind.height), 0))
+    for color, label in POWERUP_LOOKS.values():
+        keys.append(('powerup', label, color, (30, 30), 0))
+    for name, (w, h, color) in BULLET_TYPES.items():
+        keys.append(('bullet', name, color, (w, h), 0))
+    boss = Boss(600, 1)
+    keys.append(('boss', None, None, (boss.width, boss.height), 0))
+    return keys
+
+def pack(sizes, width):
+    """Shelf packing, tallest first: returns a position per size and the atlas height."""
+    order = sorted(range(len(sizes)), key=lambda i: (-sizes[i][1], -sizes[i][0]))
+    positions = [None] * len(sizes)
+    x = y = shelf = 0
+    for i in order:
+        w, h = sizes[i][0] + PADDING, sizes[i][1] + PADDING
+        if x + w > width:
+            x, y, shelf = 0, y + shelf, 0
+        positions[i] = (x, y)
+        x += w
+        shelf = max(shelf, h)
+    return positions, y + shelf
+
+def build(image_path=ATLAS_IMAGE, index_path=ATLAS_INDEX, width=ATLAS_WIDTH):
+    from sprite_cache import sprites, baker_hash
+
+    pygame.init()
+    keys = atlas_keys()
+    baked = [sprites.bakers[kind](sprite_type, color, size, angle) for kind, sprite_type, color, size, angle in keys]
+    positions, height = pack([surface.get_size() for surface, _ in baked], width)
+
+    atlas = pygame.Surface((width, height), pygame.SRCALPHA)
+    entries = []
+    for key, (surface, offset), (x, y) in zip(keys, baked, positions):
+        # Additive onto the transparent atlas copies the pixels exactly (a normal blit would blend the alpha)
+        atlas.blit(surface, (x, y), special_flags=pygame.BLEND_RGBA_ADD)
+        entries.append({'key': key, 'rect': [x, y, *surface.get_size()], 'offset': list(offset)})
+
+    pygame.image.save(atlas, image_path)
+    kinds = {key[0] for key in keys}
+    with open(index_path, 'w') as f:
+        json.dump({'bakers': baker_hash({kind: sprites.bakers[kind] for kind in kinds}), 'sprites': entries}, f, indent=1)
+    print(f"Packed {len(entries)} sprites into {image_path} ({width}x{height})")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--width", type=int, default=ATLAS_WIDTH)
+    args = parser.parse_args()
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    build(width=args.width)
@@ -0,0 +1,227 @@
+"""
+Monte Carlo balance runs: plays many headless games across all cores and
+reports how far each pilot policy and upgrade loadout gets.
+
+    python balance.py run --games 500 --out balance.json
+    python balance.py diff before.json after.json
+
+Every (policy, loadout) pair plays the same list of seeds, so two reports
+made before and after a tuning change differ only by the change. Per level
+the report holds how many games reached and cleared it, the damage taken
+there and the time-to-kill (frames from level start until the last enemy,
+or the boss, is down).
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import numpy as np
+
+from simulation import Simulation, TICK_RATE, autopilot, no_input
+
+SCREEN_WIDTH = 600
+SCREEN_HEIGHT = 800
+
+LOADOUTS = {
+    'stock': {'speed': 0, 'fire_rate': 0, 'health': 0, 'magnet': 0},
+    'mid': {'speed': 2, 'fire_rate': 2, 'health': 2, 'magnet': 1},
+    'maxed': {'speed': 5, 'fire_rate': 5, 'health': 5, 'magnet': 3},
+    'guns': {'speed': 0, 'fire_rate': 5, 'health': 0, 'magnet': 0},
+}
+
+def turret(sim):
+    """Never moves, just holds the trigger: a floor for how hard a level is."""
+    actions = no_input()
+    actions['shoot'] = True
+    return actions
+
+def dodger(sim):
+    """The autopilot, but sidesteps enemy bullets falling towards the ship first."""
+    actions = autopilot(sim)
+    rect = sim.player.rect
+    field = sim.enemy_bullets
+    n = field.count
+    x, y = field.x[:n], field.y[:n]
+    near = (y > rect.top - 150) & (y < rect.bottom) & (np.abs(x - rect.centerx) < rect.width)
+    if near.any():
+        threat = x[near].mean()
+        actions['left'] = threat >= rect.centerx and rect.left > 0
+        actions['right'] = threat < rect.centerx and rect.right < sim.screen_width
+        if not (actions['left'] or actions['right']): # Pinned against a wall, go the other way
+            actions['left'] = rect.right >= sim.screen_width
+            actions['right'] = rect.left <= 0
+    return actions
+
+POLICIES = {'autopilot': autopilot, 'dodger': dodger, 'turret': turret}
+
+def play(job):
+    """Plays one game to death or `max_frames` and returns its summary. Runs in a worker process."""
+    policy, loadout, seed, max_frames = job
+    pilot = POLICIES[policy]
+    sim = Simulation(SCREEN_WIDTH, SCREEN_HEIGHT, upgrades=dict(LOADOUTS[loadout]), visuals=False, seed=seed)
+    sim.start()
+    player = sim.player
+    lm = sim.level_manager
+
+    # level -> [frames to clear (None until cleared), damage taken]
+    levels = {lm.level: [None, 0]}
+    level_start = 0
+    health = player.health
+    while not sim.game_over and sim.frame < max_frames:
+        sim.update(pilot(sim))
+        if player.health < health:
+            levels[lm.level][1] += health - player.health
+        health = player.health
+        if lm.level not in levels:
+            levels[lm.level] = [None, 0]
+            level_start = sim.frame
+        elif lm.level_transition and levels[lm.level][0] is None:
+            levels[lm.level][0] = sim.frame - level_start
+
+    return {'policy': policy, 'loadout': loadout, 'seed': seed, 'level': lm.level, 'score': player.score,
+            'frames': sim.frame, 'died': sim.game_over,
+            'levels': {level: {'ttk': ttk, 'damage': damage} for level, (ttk, damage) in levels.items()}}
+
+def mean(values):
+    return round(float(np.mean(values)), 2) if len(values) else None
+
+def percentile(values, q):
+    return round(float(np.percentile(values, q)), 2) if len(values) else None
+
+def aggregate(games):
+    """Folds the games of one (policy, loadout) pair into the report entry."""
+    levels = {}
+    for game in games:
+        for level, stats in game['levels'].items():
+            entry = levels.setdefault(level, {'reached': 0, 'cleared': 0, 'deaths': 0, 'damage': [], 'ttk': []})
+            entry['reached'] += 1
+            entry['damage'].append(stats['damage'])
+            if stats['ttk'] is not None:
+                entry['cleared'] += 1
+                entry['ttk'].append(stats['ttk'] / TICK_RATE)
+            elif game['died']:
+                entry['deaths'] += 1
+
+    survival = [game['level'] for game in games]
+    return {
+        'games': len(games),
+        'died': sum(game['died'] for game in games),
+        'survival_level': {'mean': mean(survival), 'p10': percentile(survival, 10), 'p50': percentile(survival, 50),
+                           'p90': percentile(survival, 90), 'max': max(survival)},
+        'score': {'mean': mean([game['score'] for game in games]), 'p50': percentile([game['score'] for game in games], 50)},
+        'minutes': mean([game['frames'] / TICK_RATE / 60 for game in games]),
+        'levels': {str(level): {
+            'reached': entry['reached'],
+            'cleared': entry['cleared'],
+            'death_rate': round(entry['deaths'] / entry['reached'], 3),
+            'damage_mean': mean(entry['damage']),
+            'ttk_mean_s': mean(entry['ttk']),
+            'ttk_p90_s': percentile(entry['ttk'], 90),
+        } for level, entry in sorted(levels.items())},
+    }
+
+def run(args):
+    for name, names, known in (('policy', args.policies, POLICIES), ('loadout', args.loadouts, LOADOUTS)):
+        unknown = [n for n in names if n not in known]
+        if unknown:
+            sys.exit(f"unknown {name}(s): {', '.join(unknown)}; choose from {', '.join(known)}")
+
+    seeds = random.Random(args.seed)
+    game_seeds = [seeds.randrange(2**32) for _ in range(args.games)]
+    jobs = [(policy, loadout, seed, args.max_frames)
+            for policy in args.policies for loadout in args.loadouts for seed in game_seeds]
+    workers = args.workers or os.cpu_count() or 1
+
+    start = time.perf_counter()
+    games = {}
+    if workers == 1:
+        results = map(play, jobs)
+    else:
+        executor = ProcessPoolExecutor(max_workers=workers)
+        # Big chunks keep pickling overhead small; several per worker keep the load balanced
+        results = executor.map(play, jobs, chunksize=max(1, len(jobs) // (workers * 8)))
+    for i, game in enumerate(results, 1):
+        games.setdefault((game['policy'], game['loadout']), []).append(game)
+        if i % max(1, len(jobs) // 10) == 0:
+            print(f"{i}/{len(jobs)} games ({time.perf_counter() - start:.0f}s)")
+    if workers > 1:
+        executor.shutdown()
+    elapsed = time.perf_counter() - start
+
+    results = {}
+    for (policy, loadout), runs in sorted(games.items()):
+        entry = results.setdefault(policy, {})[loadout] = aggregate(runs)
+        survival = entry['survival_level']
+        print(f"{policy:>10} {loadout:>6}: level {survival['mean']:5.2f} (p10 {survival['p10']:g}, p90 {survival['p90']:g})  "
+              f"score {entry['score']['mean']:8.0f}  {entry['died']}/{entry['games']} died")
+    print(f"Played {len(jobs)} games on {workers} worker(s) in {elapsed:.1f}s")
+
+    report = {
+        'meta': {'games': args.games, 'seed': args.seed, 'max_frames': args.max_frames,
+                 'policies': args.policies, 'loadouts': args.loadouts},
+        'results': results,
+    }
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {args.out}")
+
+def diff(args):
+    with open(args.before) as f:
+        before = json.load(f)
+    with open(args.after) as f:
+        after = json.load(f)
+    if before['meta'] != after['meta']:
+        print("Warning: the reports were made with different settings, so the seeds don't line up")
+
+    def row(label, old, new):
+        if old == new: return
+        delta = f"{new - old:+.2f}" if isinstance(old, (int, float)) and isinstance(new, (int, float)) else ""
+        print(f"    {label:<28} {old!s:>10} -> {new!s:<10} {delta}")
+
+    for policy, loadouts in after['results'].items():
+        for loadout, new in loadouts.items():
+            old = before['results'].get(policy, {}).get(loadout)
+            if old is None:
+                continue
+            print(f"{policy} / {loadout}")
+            row('survival level', old['survival_level']['mean'], new['survival_level']['mean'])
+            row('score', old['score']['mean'], new['score']['mean'])
+            row('died', old['died'], new['died'])
+            for level in sorted(set(old['levels']) | set(new['levels']), key=int):
+                a, b = old['levels'].get(level, {}), new['levels'].get(level, {})
+                for key in ('reached', 'death_rate', 'damage_mean', 'ttk_mean_s'):
+                    row(f"level {level} {key}", a.get(key), b.get(key))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="play games in parallel and write the balance report")
+    run_parser.add_argument("--games", type=int, default=100, help="games per policy and loadout")
+    run_parser.add_argument("--policies", nargs="+", default=list(POLICIES), help=f"subset of: {', '.join(POLICIES)}")
+    run_parser.add_argument("--loadouts", nargs="+", default=list(LOADOUTS), help=f"subset of: {', '.join(LOADOUTS)}")
+    run_parser.add_argument("--max-frames", type=int, default=TICK_RATE * 60 * 10, help="stop a game that survives this long")
+    run_parser.add_argument("--seed", type=int, default=0)
+    run_parser.add_argument("--workers", type=int, help="worker processes (default: one per core; 1 runs in-process)")
+    run_parser.add_argument("--out", help="write the report as JSON")
+
+    diff_parser = commands.add_parser("diff", help="show what changed between two reports")
+    diff_parser.add_argument("before")
+    diff_parser.add_argument("after")
+
+    args = parser.parse_args()
+    if args.command == "run":
+        run(args)
+    else:
+        diff(args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Scaling curve for bullet/enemy collision checks: brute force O(B*E) over
+per-entity Rects, and BulletField.hits_boxes against the EnemyField columns
+both all-pairs and through the SpatialHash broad-phase.
+
+    python benchmarks/bench_collisions.py --sizes 25 50 100 200 400 800
+"""
+import os
+import sys
+import time
+import random
+import argparse
+
+import pygame
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from enemy import EnemyField
+import bullet
+from bullet import BulletField
+from spatial_hash import SpatialHash
+
+SCREEN_WIDTH = 600
+SCREEN_HEIGHT = 800
+
+def make_scene(n, rng):
+    # Enemies crowd the top of the screen while most bullets are still in flight
+    # below them, which is the case that makes the brute-force loop O(B*E).
+    types = ['basic', 'fast', 'sine', 'tank', 'hunter']
+    enemies = EnemyField()
+    for _ in range(n):
+        enemies.add(rng.randint(0, SCREEN_WIDTH), rng.randint(-50, SCREEN_HEIGHT * 2 // 5), rng.choice(types))
+    field = BulletField()
+    for _ in range(n):
+        field.emit(rng.randint(0, SCREEN_WIDTH), rng.randint(0, SCREEN_HEIGHT))
+    left, top, right, bottom = field.bounds()
+    rects = [pygame.Rect(l, t, r - l, b - t) for l, t, r, b in zip(left.tolist(), top.tolist(), right.tolist(), bottom.tolist())]
+    # The brute-force loop gets one Rect per enemy, as the game used to have
+    enemy_rects = [pygame.Rect(l, t, r - l, b - t) for l, t, r, b in zip(*(a.tolist() for a in enemies.bounds()))]
+    return enemies, enemy_rects, rects, field
+
+def brute_force(enemy_rects, rects):
+    hits = 0
+    for rect in rects:
+        for e in enemy_rects:
+            if rect.colliderect(e):
+                hits += 1
+                break
+    return hits
+
+def all_pairs(enemies, field):
+    return sum(1 for _ in field.hits_boxes(*enemies.bounds()))
+
+def hashed(grid, enemies, field):
+    boxes = enemies.bounds()
+    grid.rebuild(*boxes)
+    return sum(1 for _ in field.hits_boxes(*boxes, grid=grid))
+
+def time_per_frame(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - start) / repeat * 1000, result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[25, 50, 100, 200, 400, 800])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--cell", type=int, default=80)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    grid = SpatialHash(cell_size=args.cell)
+    bullet.GRID_MIN_PAIRS = 0 # Always take the grid path when it is given one
+    print(f"{'N bullets = N enemies':>22} {'brute ms':>10} {'numpy ms':>10} {'hash ms':>10}")
+    for n in args.sizes:
+        enemies, enemy_rects, rects, field = make_scene(n, rng)
+        brute_ms, brute_hits = time_per_frame(lambda: brute_force(enemy_rects, rects), args.repeat)
+        numpy_ms, numpy_hits = time_per_frame(lambda: all_pairs(enemies, field), args.repeat)
+        hash_ms, hash_hits = time_per_frame(lambda: hashed(grid, enemies, field), args.repeat)
+        assert brute_hits == hash_hits == numpy_hits, "a fast path missed a collision"
+        print(f"{n:>22} {brute_ms:>10.3f} {numpy_ms:>10.3f} {hash_ms:>10.3f}")
+
+if __name__ == "__main__":
+    main()
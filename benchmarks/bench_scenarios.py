@@ -0,0 +1,258 @@
+"""
+Stress scenarios for the game loop, built from the real game classes.
+
+    python benchmarks/bench_scenarios.py run --out results.json
+    python benchmarks/bench_scenarios.py compare baseline.json results.json
+
+Each scenario keeps a fixed load on screen (N enemies of every type, M
+player bullets, K overlapping explosions, a firing boss, a looping EMP)
+for a number of frames, once update-only ("headless") and once drawing
+the full frame ("rendered"), and records FPS plus the mean time of every
+profiler phase. `compare` exits with status 1 when a scenario's mean
+frame time got slower than the baseline by more than the threshold;
+slower phases are listed alongside to show where the time went. Phase
+timings are noisy on a busy machine, so they never fail the run.
+"""
+import os
+import sys
+import json
+import time
+import random
+import platform
+import argparse
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from enemy import TYPE_IDS
+from effects import Explosion, Starfield, Nebula
+from simulation import Simulation, no_input
+from profiler import profiler
+
+SCREEN_WIDTH = 600
+SCREEN_HEIGHT = 800
+
+# enemies: per type, bullets: player bullets in flight, boss_bullets: enemy bullets of the
+# boss type in flight, explosions: bursts alive at once
+SCENARIOS = {
+    'baseline': {},
+    'enemies': {'enemies': 40},
+    'bullets': {'bullets': 2000},
+    'bullet_hell': {'boss_bullets': 5000},
+    'explosions': {'explosions': 60},
+    'boss': {'boss': True},
+    'emp': {'enemies': 20, 'emp': True},
+    'mixed': {'enemies': 20, 'bullets': 500, 'explosions': 20, 'boss': True, 'emp': True},
+}
+
+class Scenario:
+    """A Simulation topped up every frame so the requested load never drains."""
+    def __init__(self, name, enemies=0, bullets=0, boss_bullets=0, explosions=0, boss=False, emp=False, scale=1.0, seed=0):
+        self.name = name
+        self.enemies = int(enemies * scale)
+        self.bullets = int(bullets * scale)
+        self.boss_bullets = int(boss_bullets * scale)
+        self.explosions = int(explosions * scale)
+        self.boss = boss
+        self.emp = emp
+        self.rng = random.Random(seed)
+        self.sim = Simulation(SCREEN_WIDTH, SCREEN_HEIGHT, seed=seed)
+        if boss:
+            self.sim.level_manager.level = 5 # Boss level: the level manager spawns it on the first update
+        self.sim.start()
+
+    def sustain(self, frame):
+        """Refills the load before a frame and returns that frame's input."""
+        sim, rng = self.sim, self.rng
+        lm = sim.level_manager
+        lm.spawn_timer = 0 # Only the scenario adds enemies
+        player = sim.player
+        player.health = player.max_health
+
+        if self.enemies:
+            # Boss levels skip the level manager's cleanup, so drop the dead here
+            lm.enemies.remove_inactive()
+            alive = np.bincount(lm.enemies.type[:lm.enemies.count], minlength=len(TYPE_IDS))
+            for enemy_type, type_id in TYPE_IDS.items():
+                for _ in range(self.enemies - alive[type_id]):
+                    lm.enemies.add(rng.randint(0, SCREEN_WIDTH - 60), rng.randint(-50, SCREEN_HEIGHT // 2), enemy_type)
+        for _ in range(self.bullets - sim.bullets.count):
+            sim.bullets.emit(rng.randint(0, SCREEN_WIDTH), rng.randint(0, SCREEN_HEIGHT))
+        if self.boss_bullets:
+            # A screen full of boss bullets would end the run within a frame
+            player.shield_active, player.shield_timer = True, 1000
+        for _ in range(self.boss_bullets - sim.enemy_bullets.count):
+            sim.enemy_bullets.emit(rng.randint(0, SCREEN_WIDTH), rng.randint(0, SCREEN_HEIGHT), speed=5,
+                                   dx=rng.choice((-2, 0, 2)), bullet_type='boss')
+        # Explosion particles live 20-40 frames, so a fresh wave every 30 keeps about K bursts alive
+        if self.explosions and frame % 30 == 0:
+            for _ in range(self.explosions):
+                Explosion(sim.particles, rng.randint(0, SCREEN_WIDTH), rng.randint(0, SCREEN_HEIGHT))
+        if lm.boss:
+            lm.boss.health = lm.boss.max_health
+
+        actions = no_input()
+        if self.emp and not player.emp_active:
+            player.emp_energy = player.emp_max_energy
+            actions['emp'] = True
+        return actions
+
+class Renderer:
+    """The game's full-frame draw path: backdrop, world, HUD, flip."""
+    def __init__(self):
+        from ui import UI
+        from hud import HUD
+        from render_targets import RenderTargets
+        self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+        self.targets = RenderTargets(self.screen)
+        self.hud = HUD(UI())
+        self.starfield = Starfield(SCREEN_WIDTH, SCREEN_HEIGHT)
+        self.nebula = Nebula(SCREEN_WIDTH, SCREEN_HEIGHT)
+
+    def draw(self, sim):
+        self.starfield.update()
+        self.nebula.update()
+        world = self.targets.get('world')
+        self.starfield.draw(world)
+        self.nebula.draw(world)
+        profiler.lap('draw.background')
+        sim.draw(world)
+        self.targets.present('world')
+        profiler.lap('draw.present_world')
+        self.hud.draw(self.screen, sim.player, sim.level_manager, combo=sim.combo)
+        self.hud.draw_touch_controls(self.screen)
+        profiler.lap('draw.hud')
+        pygame.display.flip()
+        profiler.lap('flip')
+
+def run_scenario(name, params, frames, warmup, scale, seed, renderer=None, repeat=1):
+    """Best of `repeat` runs by mean frame time, which filters out most scheduler noise."""
+    runs = [run_once(name, params, frames, warmup, scale, seed, renderer) for _ in range(repeat)]
+    return min(runs, key=lambda result: result['frame_ms']['mean'])
+
+def run_once(name, params, frames, warmup, scale, seed, renderer=None):
+    scenario = Scenario(name, scale=scale, seed=seed, **params)
+    sim = scenario.sim
+
+    def step(frame):
+        profiler.begin_frame()
+        sim.update(scenario.sustain(frame))
+        profiler.count(sim.entity_counts())
+        if renderer: renderer.draw(sim)
+        profiler.end_frame()
+
+    profiler.enabled = True
+    for frame in range(warmup):
+        step(frame)
+    profiler.reset(window=frames)
+    start = time.perf_counter()
+    for frame in range(warmup, warmup + frames):
+        step(frame)
+    elapsed = time.perf_counter() - start
+    profiler.enabled = False
+
+    stats = profiler.stats()
+    frame_ms = stats.pop('frame')
+    return {
+        'fps': frames / elapsed if elapsed > 0 else float('inf'),
+        'frame_ms': {'mean': frame_ms[0], 'p95': frame_ms[1], 'p99': frame_ms[2]},
+        'phases': {phase: values[0] for phase, values in stats.items()},
+        'counts': profiler.counts,
+    }
+
+def run(args):
+    names = args.scenarios or list(SCENARIOS)
+    unknown = [n for n in names if n not in SCENARIOS]
+    if unknown:
+        sys.exit(f"unknown scenario(s): {', '.join(unknown)}; choose from {', '.join(SCENARIOS)}")
+
+    pygame.init()
+    results = {}
+    renderer = None
+    for mode in args.modes:
+        if mode == 'rendered' and renderer is None:
+            renderer = Renderer()
+        for name in names:
+            result = run_scenario(name, SCENARIOS[name], args.frames, args.warmup, args.scale, args.seed,
+                                  renderer if mode == 'rendered' else None, args.repeat)
+            results.setdefault(name, {})[mode] = result
+            counts = ", ".join(f"{k} {v}" for k, v in result['counts'].items())
+            print(f"{name:>11} {mode:>9}: {result['fps']:8.0f} fps  {result['frame_ms']['mean']:7.3f} ms/frame "
+                  f"(p95 {result['frame_ms']['p95']:.3f})  [{counts}]")
+    pygame.quit()
+
+    report = {
+        'meta': {'frames': args.frames, 'warmup': args.warmup, 'repeat': args.repeat, 'scale': args.scale, 'seed': args.seed,
+                 'python': platform.python_version(), 'pygame': pygame.version.ver, 'machine': platform.machine()},
+        'results': results,
+    }
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {args.out}")
+
+def compare(args):
+    with open(args.baseline) as f:
+        baseline = json.load(f)['results']
+    with open(args.current) as f:
+        current = json.load(f)['results']
+
+    regressions = []
+    print(f"{'scenario':>11} {'mode':>9} {'metric':>24} {'baseline':>10} {'current':>10} {'change':>8}")
+    for name, modes in current.items():
+        for mode, result in modes.items():
+            old = baseline.get(name, {}).get(mode)
+            if old is None:
+                continue
+            metrics = [('frame', old['frame_ms']['mean'], result['frame_ms']['mean'])]
+            metrics += [(phase, old['phases'][phase], ms) for phase, ms in result['phases'].items() if phase in old['phases']]
+            for metric, before, after in metrics:
+                change = (after - before) / before if before > 0 else 0.0
+                # Slowdowns under `min_ms` are mostly timer noise
+                slower = change > args.threshold and after - before > args.min_ms
+                if metric == 'frame':
+                    print(f"{name:>11} {mode:>9} {metric:>24} {before:10.3f} {after:10.3f} {change:+8.1%}"
+                          f"{'  REGRESSION' if slower else ''}")
+                    if slower:
+                        regressions.append((name, mode))
+                elif slower:
+                    print(f"{name:>11} {mode:>9} {metric:>24} {before:10.3f} {after:10.3f} {change:+8.1%}  slower")
+
+    if regressions:
+        print(f"{len(regressions)} scenario(s) regressed by more than {args.threshold:.0%}")
+        sys.exit(1)
+    print("No regressions")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run scenarios and report per-phase timings")
+    run_parser.add_argument("--scenarios", nargs="+", help=f"subset of: {', '.join(SCENARIOS)}")
+    run_parser.add_argument("--modes", nargs="+", choices=["headless", "rendered"], default=["headless", "rendered"])
+    run_parser.add_argument("--frames", type=int, default=600)
+    run_parser.add_argument("--warmup", type=int, default=60)
+    run_parser.add_argument("--repeat", type=int, default=3, help="keep the fastest of this many runs per scenario")
+    run_parser.add_argument("--scale", type=float, default=1.0, help="multiply every scenario's entity counts")
+    run_parser.add_argument("--seed", type=int, default=0)
+    run_parser.add_argument("--out", help="write results as JSON")
+
+    compare_parser = commands.add_parser("compare", help="flag regressions against a stored baseline")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=0.2, help="relative slowdown that counts as a regression")
+    compare_parser.add_argument("--min-ms", type=float, default=0.05, help="ignore slowdowns smaller than this many ms")
+
+    args = parser.parse_args()
+    if args.command == "run":
+        run(args)
+    else:
+        compare(args)
+
+if __name__ == "__main__":
+    main()
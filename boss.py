@@ -1,16 +1,18 @@
 
 import pygame
 import random
-import math
-from bullet import Bullet
+from sprite_cache import sprites
+from render_targets import new_surface
 
 class Boss:
-    def __init__(self, screen_width, level):
+    def __init__(self, screen_width, level, rng=None):
         self.screen_width = screen_width
+        self.rng = rng or random.Random()
         self.width = 150
         self.height = 100
         self.x = (screen_width - self.width) // 2
         self.y = -self.height
+        self.prev_x, self.prev_y = self.x, self.y
         self.target_y = 100
         self.rect = pygame.Rect(self.x, self.y, self.width, self.height)
         
@@ -25,10 +27,9 @@ class Boss:
         self.attack_cooldown = 60 # frames
         self.phase = 0 # 0: move, 1: attack
         
-    def update(self, player_rect):
-        if not self.active: return []
-        
-        boss_bullets = []
+    def update(self, player_rect, bullets):
+        if not self.active: return
+        self.prev_x, self.prev_y = self.x, self.y
         
         if self.state == 'entering':
             if self.y < self.target_y:
@@ -50,31 +51,26 @@ class Boss:
             self.attack_timer += 1
             if self.attack_timer >= self.attack_cooldown:
                 self.attack_timer = 0
-                pattern = random.choice(['spread', 'aimed', 'circle'])
-                boss_bullets = self.attack(pattern, player_rect)
+                pattern = self.rng.choice(['spread', 'aimed', 'circle'])
+                self.attack(pattern, player_rect, bullets)
         
         self.rect.x = int(self.x)
         self.rect.y = int(self.y)
-        return boss_bullets
 
-    def attack(self, pattern, player_rect):
-        bullets = []
+    def attack(self, pattern, player_rect, bullets):
         center_x = self.rect.centerx
         bottom_y = self.rect.bottom
         
         if pattern == 'spread':
             for i in range(-2, 3):
                 # Pass dx for spread
-                b = Bullet(center_x, bottom_y, speed=5, dx=i*2, bullet_type='boss')
-                bullets.append(b)
+                bullets.emit(center_x, bottom_y, speed=5, dx=i*2, bullet_type='boss')
                 
         elif pattern == 'aimed':
             # Simple stream
-            bullets.append(Bullet(center_x, bottom_y, speed=7, bullet_type='boss'))
-            bullets.append(Bullet(center_x - 30, bottom_y, speed=7, bullet_type='boss'))
-            bullets.append(Bullet(center_x + 30, bottom_y, speed=7, bullet_type='boss'))
-            
-        return bullets
+            bullets.emit(center_x, bottom_y, speed=7, bullet_type='boss')
+            bullets.emit(center_x - 30, bottom_y, speed=7, bullet_type='boss')
+            bullets.emit(center_x + 30, bottom_y, speed=7, bullet_type='boss')
 
     def take_damage(self, amount):
         self.health -= amount
@@ -83,27 +79,39 @@ class Boss:
             return True
         return False
 
-    def draw(self, surface):
+    def draw(self, surface, alpha=1.0):
         if not self.active: return
-        
-        # Draw complex shape for Boss
-        # Main Body
-        pygame.draw.rect(surface, (150, 0, 50), self.rect, border_radius=20)
-        # Inner Core
-        pygame.draw.circle(surface, (255, 50, 50), self.rect.center, 30)
-        # Wings info
-        pygame.draw.polygon(surface, (100, 0, 0), [
-            (self.rect.left, self.rect.top),
-            (self.rect.left - 30, self.rect.centery),
-            (self.rect.left, self.rect.bottom)
-        ])
-        pygame.draw.polygon(surface, (100, 0, 0), [
-            (self.rect.right, self.rect.top),
-            (self.rect.right + 30, self.rect.centery),
-            (self.rect.right, self.rect.bottom)
-        ])
-        
-        # Glow
-        s = pygame.Surface((self.width + 100, self.height + 50), pygame.SRCALPHA)
-        pygame.draw.ellipse(s, (255, 0, 0, 50), s.get_rect())
-        surface.blit(s, (self.x - 50, self.y - 25))
+        sprite, (ox, oy) = sprites.get('boss', size=(self.width, self.height))
+        x = int(self.x - (self.x - self.prev_x) * (1 - alpha))
+        y = int(self.y - (self.y - self.prev_y) * (1 - alpha))
+        surface.blit(sprite, (x + ox, y + oy))
+
+def bake_boss(boss_type, color, size, angle):
+    width, height = size
+    surf = new_surface((width + 100, height + 50), pygame.SRCALPHA)
+    rect = pygame.Rect(50, 25, width, height)
+
+    # Draw complex shape for Boss
+    # Main Body
+    pygame.draw.rect(surf, (150, 0, 50), rect, border_radius=20)
+    # Inner Core
+    pygame.draw.circle(surf, (255, 50, 50), rect.center, 30)
+    # Wings info
+    pygame.draw.polygon(surf, (100, 0, 0), [
+        (rect.left, rect.top),
+        (rect.left - 30, rect.centery),
+        (rect.left, rect.bottom)
+    ])
+    pygame.draw.polygon(surf, (100, 0, 0), [
+        (rect.right, rect.top),
+        (rect.right + 30, rect.centery),
+        (rect.right, rect.bottom)
+    ])
+
+    # Glow
+    s = new_surface(surf.get_size(), pygame.SRCALPHA)
+    pygame.draw.ellipse(s, (255, 0, 0, 50), s.get_rect())
+    surf.blit(s, (0, 0))
+    return surf, (-50, -25)
+
+sprites.register('boss', bake_boss)
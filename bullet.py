@@ -1,46 +1,180 @@
-
 import pygame
-import math
-
-class Bullet:
-    def __init__(self, x, y, speed=-10, dx=0, bullet_type='normal'):
-        self.x = x
-        self.y = y
-        self.dy = speed
-        self.dx = dx
-        self.active = True
-        self.type = bullet_type
-        
-        # Dimensions based on type
-        if self.type == 'boss':
-             self.width = 15
-             self.height = 30
-             self.color = (255, 50, 50)
-        else:
-             self.width = 6
-             self.height = 15
-             self.color = (100, 255, 255)
-
-        self.rect = pygame.Rect(self.x - self.width//2, self.y, self.width, self.height)
+import numpy as np
+from entities import Archetype
+from sprite_cache import sprites
+from render_targets import new_surface
+
+# name -> (width, height, glow color)
+BULLET_TYPES = {
+    'normal': (6, 15, (100, 255, 255)),
+    'boss': (15, 30, (255, 50, 50)),
+    'vanguard': (6, 15, (255, 100, 0)),
+}
+TYPE_NAMES = list(BULLET_TYPES)
+TYPE_IDS = {name: i for i, name in enumerate(TYPE_NAMES)}
+GRID_MIN_PAIRS = 100000 # Below this many bullet x target pairs the all-pairs test beats binning the grid
+DIRECT_MAX_PAIRS = 64 # Up to this many bullet x target pairs a Python loop beats the broadcast test
+FLAT_ABOVE = 2000 # More bullets than this in one field are drawn with the cheaper flat sprites
+
+class BulletField(Archetype):
+    """
+    All bullets of one side (player or enemy) as one archetype of parallel
+    NumPy columns. Motion, off-screen culling and AABB tests run over the whole
+    field at once; `compact()` swap-removes inactive rows so live bullets stay
+    contiguous in [0, count). `px`/`py` hold the positions before the last
+    update, for interpolated drawing.
+    """
+    def __init__(self, capacity=256):
+        super().__init__({
+            'x': np.float64, 'y': np.float64, 'px': np.float64, 'py': np.float64,
+            'dx': np.float64, 'dy': np.float64, 'width': np.int32, 'height': np.int32,
+            'type': np.int8, 'active': np.bool_,
+        }, capacity)
+        self._bounds = None
+
+    def emit(self, x, y, speed=-10, dx=0, bullet_type='normal'):
+        entity, i = self.allocate() # Every column is set below, so skip spawn()'s defaults
+        w, h, _ = BULLET_TYPES[bullet_type]
+        self.x[i] = self.px[i] = x
+        self.y[i] = self.py[i] = y
+        self.dx[i] = dx
+        self.dy[i] = speed
+        self.width[i] = w
+        self.height[i] = h
+        self.type[i] = TYPE_IDS[bullet_type]
+        self.active[i] = True
+        self._bounds = None
+        return entity
+
+    def clear(self):
+        super().clear()
+        self._bounds = None
 
     def update(self):
-        self.y += self.dy
-        self.x += self.dx
-        self.rect.y = int(self.y)
-        self.rect.x = int(self.x - self.width//2)
-        
+        n = self.count
+        if n == 0: return
+        self._bounds = None
+        self.px[:n] = self.x[:n]
+        self.py[:n] = self.y[:n]
+        y = self.y[:n]
+        y += self.dy[:n]
+        self.x[:n] += self.dx[:n]
+
         # Deactivate if off screen
-        if self.y < -50 or self.y > 1000: # Assuming typical height < 1000
-            self.active = False
-
-    def draw(self, surface):
-        if not self.active: return
-        
-        # Draw with a glow
-        # Core
-        pygame.draw.rect(surface, (255, 255, 255), self.rect, border_radius=2)
-        
-        # Glow
-        glow_surf = pygame.Surface((self.width * 4, self.height * 2), pygame.SRCALPHA)
-        pygame.draw.rect(glow_surf, (*self.color, 80), (self.width, self.height//2, self.width * 2, self.height), border_radius=5)
-        surface.blit(glow_surf, (self.x - self.width * 2, self.y - self.height//4))
+        self.active[:n] &= (y >= -50) & (y <= 1000) # Assuming typical height < 1000
+
+    def compact(self):
+        n = self.count
+        self.remove_inactive()
+        if self.count != n:
+            self._bounds = None
+
+    def bounds(self):
+        """Integer (left, top, right, bottom) arrays matching the old per-bullet Rect."""
+        if self._bounds is None:
+            n = self.count
+            left = (self.x[:n] - self.width[:n] // 2).astype(np.int64)
+            top = self.y[:n].astype(np.int64)
+            self._bounds = (left, top, left + self.width[:n], top + self.height[:n])
+        return self._bounds
+
+    def hits_rect(self, rect):
+        """Indices of active bullets overlapping `rect`."""
+        if self.count == 0: return np.empty(0, dtype=np.int64)
+        left, top, right, bottom = self.bounds()
+        mask = self.active[:self.count] & (left < rect.right) & (right > rect.left) & (top < rect.bottom) & (bottom > rect.top)
+        return np.flatnonzero(mask)
+
+    def hits_rects(self, rects, chunk=4096):
+        """Like `hits_boxes`, for a list of Rects."""
+        if self.count == 0 or not rects: return ()
+        targets = np.array([(r.left, r.top, r.right, r.bottom) for r in rects], dtype=np.int64)
+        return self.hits_boxes(*targets.T, chunk=chunk)
+
+    def hits_boxes(self, t_left, t_top, t_right, t_bottom, grid=None, chunk=4096):
+        """
+        Yields (bullet index, target indices) for every active bullet overlapping
+        any of the target boxes, both in ascending order so callers can apply
+        hits in a fixed order. A few pairs are tested in plain Python. `grid`, a SpatialHash built over the targets,
+        limits the exact test to pairs sharing a cell once there are enough
+        bullets and targets for that to pay off.
+        """
+        if self.count == 0 or len(t_left) == 0: return
+        left, top, right, bottom = self.bounds()
+        active = self.active[:self.count]
+        if self.count * len(t_left) <= DIRECT_MAX_PAIRS:
+            targets = list(enumerate(zip(t_left.tolist(), t_top.tolist(), t_right.tolist(), t_bottom.tolist())))
+            for i, (alive, l, t, r, b) in enumerate(zip(active.tolist(), left.tolist(), top.tolist(), right.tolist(), bottom.tolist())):
+                if alive:
+                    hit = [j for j, (tl, tt, tr, tb) in targets if l < tr and r > tl and t < tb and b > tt]
+                    if hit: yield i, hit
+            return
+        if grid is not None and not grid.linear and self.count * len(t_left) >= GRID_MIN_PAIRS:
+            b, t = grid.pairs(left, top, right, bottom)
+            hit = (active[b] & (left[b] < t_right[t]) & (right[b] > t_left[t]) &
+                   (top[b] < t_bottom[t]) & (bottom[b] > t_top[t]))
+            # Sorted and unique, as a pair sharing two cells was found twice
+            pair = np.unique(b[hit] * len(t_left) + t[hit])
+            if len(pair) == 0: return
+            b, t = pair // len(t_left), pair % len(t_left)
+            splits = np.flatnonzero(np.diff(b)) + 1
+            yield from zip(b[np.r_[0, splits]].tolist(), np.split(t, splits))
+            return
+        for start in range(0, self.count, chunk):
+            sl = slice(start, start + chunk)
+            overlap = ((left[sl, None] < t_right) & (right[sl, None] > t_left) &
+                       (top[sl, None] < t_bottom) & (bottom[sl, None] > t_top))
+            overlap &= active[sl, None]
+            for row in np.flatnonzero(overlap.any(axis=1)):
+                yield start + int(row), np.flatnonzero(overlap[row])
+
+    def draw(self, surface, alpha=1.0):
+        """`alpha` in [0, 1] places bullets between their previous and current positions."""
+        if self.count == 0: return
+        n = self.count
+        idx = np.flatnonzero(self.active[:n])
+        types = self.type[idx]
+        kind = 'bullet_flat' if len(idx) > FLAT_ABOVE else 'bullet'
+        looks = [sprites.get(kind, name, BULLET_TYPES[name][2], BULLET_TYPES[name][:2]) for name in TYPE_NAMES]
+        off = np.array([offset for _, offset in looks], dtype=np.int64)[types]
+        x, y = self.x[idx], self.y[idx]
+        if alpha < 1.0:
+            px, py = self.px[idx], self.py[idx]
+            x = x - (x - px) * (1 - alpha)
+            y = y - (y - py) * (1 - alpha)
+        xs = (x - self.width[idx] // 2).astype(np.int64) + off[:, 0]
+        ys = y.astype(np.int64) + off[:, 1]
+        surfaces = [surf for surf, _ in looks]
+        # (surface, (x, y)) pairs built by iterators rather than a per-bullet Python loop
+        surface.blits(zip(map(surfaces.__getitem__, types.tolist()), zip(xs.tolist(), ys.tolist())), doreturn=False)
+
+def bake_bullet(bullet_type, color, size, angle):
+    """
+    Core plus glow composited once, cropped to the visible pixels so thousands
+    of blits don't pay for transparent padding. Anchored on the bullet rect.
+    """
+    w, h = size
+    sprite = new_surface((w * 4, h * 2), pygame.SRCALPHA)
+    pygame.draw.rect(sprite, (255, 255, 255), (w * 2 - w // 2, h // 4, w, h), border_radius=2)
+    glow = new_surface((w * 4, h * 2), pygame.SRCALPHA)
+    pygame.draw.rect(glow, (*color, 80), (w, h // 2, w * 2, h), border_radius=5)
+    sprite.blit(glow, (0, 0))
+    crop = sprite.get_bounding_rect()
+    return sprite.subsurface(crop).copy(), (crop.x - (w * 2 - w // 2), crop.y - h // 4)
+
+def bake_flat_bullet(bullet_type, color, size, angle):
+    """
+    `bake_bullet` blended over black into an opaque sprite with black as its
+    colorkey, for bullet-hell densities: colorkey blits cost about half of
+    per-pixel alpha ones. The glow is no longer translucent, so it darkens
+    the backdrop and any bullet it overlaps; below FLAT_ABOVE bullets the
+    alpha sprite is drawn instead.
+    """
+    sprite, offset = bake_bullet(bullet_type, color, size, angle)
+    flat = new_surface(sprite.get_size()) # Starts black
+    flat.blit(sprite, (0, 0))
+    flat.set_colorkey((0, 0, 0))
+    return flat, offset
+
+sprites.register('bullet', bake_bullet)
+sprites.register('bullet_flat', bake_flat_bullet)
@@ -2,114 +2,258 @@
 import pygame
 import random
 import math
+import numpy as np
+from entities import Archetype
+from text_cache import text_cache
+from render_targets import new_surface, to_display_format
 
-class Particle:
-    def __init__(self, x, y, color, speed, lifetime):
-        self.x = x
-        self.y = y
-        self.color = color
-        self.angle = random.uniform(0, 2 * math.pi)
-        self.speed = speed * random.uniform(0.5, 1.5)
-        self.vx = math.cos(self.angle) * self.speed
-        self.vy = math.sin(self.angle) * self.speed
-        self.lifetime = lifetime
-        self.age = 0
-        self.size = random.randint(2, 4)
+BACKGROUND_COLOR = (5, 5, 15) # Darker cosmic blue
+
+# Draw layers: trails sit under the ship, explosions on top of everything
+LAYER_UNDER = 0
+LAYER_OVER = 1
+
+class ParticleSystem:
+    """
+    Every particle in the game, stored as parallel NumPy arrays and advanced in
+    one vectorized step. Drawing blits pre-rendered circles from a small cache
+    keyed by (color, radius, alpha bucket) instead of building a surface per particle.
+    """
+    def __init__(self, capacity=1024, alpha_buckets=16, rng=None):
+        self.count = 0
+        self.capacity = capacity
+        self.alpha_buckets = alpha_buckets
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.fields = {
+            'x': np.float64, 'y': np.float64, 'px': np.float64, 'py': np.float64, 'vx': np.float64, 'vy': np.float64,
+            'size': np.float64, 'age': np.int32, 'lifetime': np.int32,
+            'color': np.int16, 'layer': np.int8,
+        }
+        for name, dtype in self.fields.items():
+            setattr(self, name, np.zeros(capacity, dtype=dtype))
+        self.palette = {}
+        self.sprites = {}
+
+    def __len__(self):
+        return self.count
+
+    def _color_id(self, color):
+        color = tuple(color)
+        if color not in self.palette:
+            self.palette[color] = len(self.palette)
+        return self.palette[color]
+
+    def emit(self, x, y, vx, vy, size, lifetime, color, layer=LAYER_OVER):
+        """Adds len(vx) particles; every argument may be a scalar or an array."""
+        vx = np.atleast_1d(vx)
+        k = len(vx)
+        if self.count + k > self.capacity:
+            capacity = self.capacity
+            while self.count + k > capacity: capacity *= 2
+            for name, dtype in self.fields.items():
+                arr = np.zeros(capacity, dtype=dtype)
+                arr[:self.count] = getattr(self, name)[:self.count]
+                setattr(self, name, arr)
+            self.capacity = capacity
+        sl = slice(self.count, self.count + k)
+        self.x[sl] = self.px[sl] = x
+        self.y[sl] = self.py[sl] = y
+        self.vx[sl] = vx
+        self.vy[sl] = vy
+        self.size[sl] = size
+        self.age[sl] = 0
+        self.lifetime[sl] = lifetime
+        self.color[sl] = self._color_id(color)
+        self.layer[sl] = layer
+        self.count += k
+
+    def clear(self):
+        self.count = 0
 
     def update(self):
-        self.x += self.vx
-        self.y += self.vy
-        self.age += 1
-        self.size = max(0, self.size - 0.05)
+        n = self.count
+        if n == 0: return
+        self.px[:n] = self.x[:n]
+        self.py[:n] = self.y[:n]
+        self.x[:n] += self.vx[:n]
+        self.y[:n] += self.vy[:n]
+        self.age[:n] += 1
+        size = self.size[:n]
+        np.maximum(size - 0.05, 0, out=size)
 
-    def draw(self, surface):
-        if self.age < self.lifetime:
-            alpha = max(0, 255 - (self.age / self.lifetime) * 255)
-            # Create a transparent surface for the particle
-            s = pygame.Surface((int(self.size * 2), int(self.size * 2)), pygame.SRCALPHA)
-            color_with_alpha = (*self.color, int(alpha))
-            pygame.draw.circle(s, color_with_alpha, (int(self.size), int(self.size)), int(self.size))
-            surface.blit(s, (self.x - self.size, self.y - self.size))
+        alive = self.age[:n] < self.lifetime[:n]
+        k = int(np.count_nonzero(alive))
+        if k < n:
+            for name in self.fields:
+                arr = getattr(self, name)
+                arr[:k] = arr[:n][alive]
+            self.count = k
+
+    def _sprite(self, color_id, radius, bucket):
+        key = (color_id, radius, bucket)
+        sprite = self.sprites.get(key)
+        if sprite is None:
+            color = list(self.palette)[color_id]
+            alpha = bucket * 255 // (self.alpha_buckets - 1)
+            sprite = new_surface((radius * 2, radius * 2), pygame.SRCALPHA)
+            pygame.draw.circle(sprite, (*color, alpha), (radius, radius), radius)
+            sprite = to_display_format(sprite)
+            self.sprites[key] = sprite
+        return sprite
+
+    def draw(self, surface, layer=None, alpha=1.0):
+        n = self.count
+        if n == 0: return
+        radius = self.size[:n].astype(np.int64)
+        visible = radius > 0
+        if layer is not None:
+            visible &= self.layer[:n] == layer
+        idx = np.flatnonzero(visible)
+        if len(idx) == 0: return
+
+        radius = radius[idx]
+        fade = 255 - (self.age[idx] / self.lifetime[idx]) * 255
+        buckets = np.rint(fade * (self.alpha_buckets - 1) / 255).astype(np.int64)
+        x, y = self.x[idx], self.y[idx]
+        if alpha < 1.0: # Between the previous and current tick
+            px, py = self.px[idx], self.py[idx]
+            x = x - (x - px) * (1 - alpha)
+            y = y - (y - py) * (1 - alpha)
+        xs = (x - radius).astype(np.int64).tolist()
+        ys = (y - radius).astype(np.int64).tolist()
+        sprite = self._sprite
+        surface.blits([(sprite(c, r, a), (x, y)) for c, r, a, x, y in
+                       zip(self.color[idx].tolist(), radius.tolist(), buckets.tolist(), xs, ys)], doreturn=False)
 
 class Starfield:
-    def __init__(self, width, height):
+    """
+    Three parallax layers of stars, each stored as NumPy position arrays and
+    advanced with one vectorized add-and-wrap per layer.
+
+    Sparse layers blit a pre-rendered star sprite per star. Layers with at
+    least `tile_threshold` stars are baked once into a screen-sized tile
+    (colorkeyed, with wrap-around copies at the seam) that is scrolled with
+    two blits, so their cost no longer depends on the star count. Tiled
+    layers repeat every screen height instead of re-rolling x on wrap.
+    """
+    # (count, speed, size, brightness) at density 1.0: [Distant, Mid, Near]
+    LAYERS = [(50, 0.5, 1, 150), (30, 1.2, 2, 200), (15, 2.5, 3, 255)]
+
+    def __init__(self, width, height, density=1.0, tile_threshold=600):
         self.width = width
         self.height = height
-        # Divide stars into 3 layers: [Distant, Mid, Near]
-        self.layers = [
-            {'stars': [self._create_star(0.5, 1, 150) for _ in range(50)], 'speed_mult': 1},
-            {'stars': [self._create_star(1.2, 2, 200) for _ in range(30)], 'speed_mult': 2},
-            {'stars': [self._create_star(2.5, 3, 255) for _ in range(15)], 'speed_mult': 4}
-        ]
-            
-    def _create_star(self, speed_base, size, brightness):
-        return {
-            'x': random.randint(0, self.width),
-            'y': random.randint(0, self.height),
-            'speed': speed_base,
+        self.rng = np.random.default_rng()
+        self.layers = [self._create_layer(max(1, int(count * density)), speed, size, brightness, tile_threshold)
+                       for count, speed, size, brightness in self.LAYERS]
+
+    def __len__(self):
+        return sum(len(layer['x']) for layer in self.layers)
+
+    def _create_layer(self, count, speed, size, brightness, tile_threshold):
+        # Stars are opaque discs, so black works as a colorkey and keeps blits cheap
+        sprite = new_surface((size * 2, size * 2))
+        sprite.set_colorkey((0, 0, 0))
+        pygame.draw.circle(sprite, (brightness, brightness, brightness), (size, size), size)
+        layer = {
+            'x': self.rng.integers(0, self.width + 1, count),
+            'y': self.rng.integers(0, self.height + 1, count).astype(np.float64),
+            'speed': speed,
             'size': size,
-            'brightness': brightness
+            'sprite': to_display_format(sprite),
+            'tile': None,
+            'offset': 0.0,
         }
+        if count >= tile_threshold:
+            layer['tile'] = self._render_tile(layer)
+        return layer
+
+    def _render_tile(self, layer):
+        tile = new_surface((self.width, self.height))
+        tile.set_colorkey((0, 0, 0))
+        sprite, r = layer['sprite'], layer['size']
+        xs = (layer['x'] - r).tolist()
+        ys = (layer['y'].astype(np.int64) - r).tolist()
+        # Each star is also drawn one tile up and down so discs on the seam aren't cut
+        for shift in (-self.height, 0, self.height):
+            tile.blits([(sprite, (x, y + shift)) for x, y in zip(xs, ys)], doreturn=False)
+        return to_display_format(tile)
 
     def update(self):
         for layer in self.layers:
-            for star in layer['stars']:
-                star['y'] += star['speed']
-                if star['y'] > self.height:
-                    star['y'] = 0
-                    star['x'] = random.randint(0, self.width)
+            if layer['tile'] is not None:
+                layer['offset'] = (layer['offset'] + layer['speed']) % self.height
+                continue
+            y = layer['y']
+            y += layer['speed']
+            wrapped = y > self.height
+            k = int(np.count_nonzero(wrapped))
+            if k:
+                y[wrapped] = 0
+                layer['x'][wrapped] = self.rng.integers(0, self.width + 1, k)
     
-    def draw(self, surface):
-        surface.fill((5, 5, 15)) # Darker cosmic blue
-        for layer in self.layers:
-            for star in layer['stars']:
-                color = (star['brightness'], star['brightness'], star['brightness'])
-                pygame.draw.circle(surface, color, (int(star['x']), int(star['y'])), int(star['size']))
+    def draw(self, surface, alpha=1.0):
+        surface.fill(BACKGROUND_COLOR)
+        self.draw_stars(surface, alpha)
 
-class TrailParticle(Particle):
-    def __init__(self, x, y, color):
-        super().__init__(x, y, color, 1, 30)
-        self.vx = random.uniform(-0.5, 0.5)
-        self.vy = random.uniform(1, 3) # Move downwards
-        self.size = random.uniform(2, 5)
+    def draw_stars(self, surface, alpha=1.0):
+        """
+        Draws the stars without clearing; returns the rects they covered.
+        `alpha` < 1 draws them part of a tick behind, to match interpolated entities.
+        """
+        rects = []
+        for layer in self.layers:
+            lag = layer['speed'] * (1.0 - alpha)
+            tile = layer['tile']
+            if tile is not None:
+                offset = int((layer['offset'] - lag) % self.height)
+                surface.blits([(tile, (0, offset - self.height)), (tile, (0, offset))], doreturn=False)
+                rects.append(pygame.Rect(0, 0, self.width, self.height))
+                continue
+            sprite, r = layer['sprite'], layer['size']
+            xs = (layer['x'] - r).tolist()
+            ys = ((layer['y'] - lag).astype(np.int64) - r).tolist()
+            rects.extend(surface.blits([(sprite, (x, y)) for x, y in zip(xs, ys)]))
+        return rects
 
 class Trail:
-    def __init__(self, color=(0, 200, 255)):
-        self.particles = []
+    """Engine exhaust: one particle per frame drifting down behind the ship."""
+    def __init__(self, particles, color=(0, 200, 255)):
+        self.particles = particles
         self.color = color
 
     def add(self, x, y):
-        self.particles.append(TrailParticle(x, y, self.color))
-
-    def update(self):
-        for p in self.particles:
-            p.update()
-        self.particles = [p for p in self.particles if p.age < p.lifetime]
-
-    def draw(self, surface):
-        for p in self.particles:
-            p.draw(surface)
+        rng = self.particles.rng
+        self.particles.emit(x, y, rng.uniform(-0.5, 0.5), rng.uniform(1, 3), # Move downwards
+                            rng.uniform(2, 5), 30, self.color, layer=LAYER_UNDER)
 
 class Explosion:
-    def __init__(self, x, y, color=(255, 100, 50)):
-        self.particles = []
-        for _ in range(20):
-            self.particles.append(Particle(x, y, color, random.uniform(2, 5), random.randint(20, 40)))
-
-    def update(self):
-        for p in self.particles:
-            p.update()
-        self.particles = [p for p in self.particles if p.age < p.lifetime]
-        return len(self.particles) > 0
-
-    def draw(self, surface):
-        for p in self.particles:
-            p.draw(surface)
+    """Burst of 20 particles flying out in random directions."""
+    def __init__(self, particles, x, y, color=(255, 100, 50), count=20):
+        rng = particles.rng
+        angle = rng.uniform(0, 2 * math.pi, count)
+        speed = rng.uniform(2, 5, count) * rng.uniform(0.5, 1.5, count)
+        particles.emit(x, y, np.cos(angle) * speed, np.sin(angle) * speed,
+                       rng.integers(2, 5, count), rng.integers(20, 41, count), color)
 
 class Nebula:
-    def __init__(self, width, height):
+    """
+    Large soft clouds drifting behind the action. Each blob's gradient is
+    rendered once when it is created, so a frame costs one blit per blob.
+
+    With `resolution` below 1.0 the blobs are composited into a smaller layer
+    that is upscaled to the screen. The layer is only rebuilt when a blob moves
+    a whole low-res pixel, so most frames are a single blit; this trades
+    softness for fill rate on weak web and mobile clients.
+    """
+    def __init__(self, width, height, resolution=1.0):
         self.width = width
         self.height = height
+        self.resolution = resolution
+        self.layer = None
+        if resolution < 1.0:
+            self.layer = new_surface((max(1, int(width * resolution)), max(1, int(height * resolution))), pygame.SRCALPHA)
+            self.upscaled = to_display_format(new_surface((width, height), pygame.SRCALPHA))
+            self.layer_key = None
         self.blobs = []
         for _ in range(3):
             self.blobs.append(self._create_blob())
@@ -117,56 +261,87 @@ class Nebula:
     def _create_blob(self):
         # Large soft colorful clouds
         colors = [(80, 0, 150), (0, 80, 150), (100, 0, 100)]
-        return {
+        blob = {
             'x': random.randint(0, self.width),
             'y': random.randint(0, self.height),
             'size': random.randint(200, 400),
             'color': random.choice(colors),
             'speed': random.uniform(0.1, 0.3)
         }
+        blob['sprite'] = self._render_blob(blob['size'], blob['color'])
+        return blob
+
+    def _render_blob(self, size, color):
+        # We draw a very soft circle by using a surface with per-pixel alpha
+        s = new_surface((size*2, size*2), pygame.SRCALPHA)
+        # Multi-layered circles for a gradient effect
+        for r in range(size, 0, -20):
+            alpha = int(40 * (1 - r/size))
+            pygame.draw.circle(s, (*color, alpha), (size, size), r)
+        if self.resolution < 1.0:
+            scaled = max(1, int(size * 2 * self.resolution))
+            s = pygame.transform.smoothscale(s, (scaled, scaled))
+        return to_display_format(s)
 
     def update(self):
         for b in self.blobs:
             b['y'] += b['speed']
             if b['y'] > self.height + b['size']:
+                # Recycled blobs keep their size and color, so the gradient is reused
                 b['y'] = -b['size']
                 b['x'] = random.randint(0, self.width)
 
     def draw(self, surface):
-        for b in self.blobs:
-            # We draw a very soft circle by using a surface with per-pixel alpha
-            s = pygame.Surface((b['size']*2, b['size']*2), pygame.SRCALPHA)
-            # Multi-layered circles for a gradient effect
-            for r in range(b['size'], 0, -20):
-                alpha = int(40 * (1 - r/b['size']))
-                pygame.draw.circle(s, (*b['color'], alpha), (b['size'], b['size']), r)
-            surface.blit(s, (b['x']-b['size'], b['y']-b['size']))
-
-class FloatingText:
-    def __init__(self, x, y, text, color=(255, 255, 255)):
-        self.x = x
-        self.y = y
-        self.text = text
-        self.color = color
-        self.lifetime = 40
-        self.age = 0
-        self.vy = -1.5
+        if self.layer is None:
+            surface.blits([(b['sprite'], (b['x']-b['size'], b['y']-b['size'])) for b in self.blobs], doreturn=False)
+            return
+
+        scale = self.resolution
+        positions = [(int((b['x']-b['size']) * scale), int((b['y']-b['size']) * scale)) for b in self.blobs]
+        if positions != self.layer_key:
+            self.layer_key = positions
+            self.layer.fill((0, 0, 0, 0))
+            self.layer.blits(list(zip([b['sprite'] for b in self.blobs], positions)), doreturn=False)
+            pygame.transform.scale(self.layer, (self.width, self.height), self.upscaled)
+        surface.blit(self.upscaled, (0, 0))
+
+class FloatingTextField(Archetype):
+    """Score popups rising and fading out together; text and color are object columns."""
+    LIFETIME = 40
+    RISE = -1.5
+    FADE_STEP = 16
+
+    def __init__(self, capacity=32):
+        super().__init__({
+            'x': np.float64, 'y': np.float64, 'py': np.float64, 'age': np.int32,
+            'text': object, 'color': object,
+        }, capacity)
+
+    def add(self, x, y, text, color=(255, 255, 255)):
+        return self.spawn(x=x, y=y, py=y, text=text, color=color)
 
     def update(self):
-        self.y += self.vy
-        self.age += 1
-        return self.age < self.lifetime
+        n = self.count
+        if n == 0: return
+        self.py[:n] = self.y[:n]
+        self.y[:n] += self.RISE
+        self.age[:n] += 1
+        self.remove_where(self.age[:n] >= self.LIFETIME)
 
-    def draw(self, surface, font):
-        alpha = int(255 * (1 - self.age/self.lifetime))
-        text_surf = font.render(self.text, True, self.color)
-        text_surf.set_alpha(alpha)
-        surface.blit(text_surf, (self.x, self.y))
+    def draw(self, surface, alpha=1.0):
+        n = self.count
+        if n == 0: return
+        y = self.y[:n] - (self.y[:n] - self.py[:n]) * (1 - alpha)
+        # Fades in steps of FADE_STEP so the cache keeps a handful of faded copies per text
+        fades = 255 - (255 - (255 * (1 - self.age[:n] / self.LIFETIME)).astype(np.int64)) // self.FADE_STEP * self.FADE_STEP
+        for x, y, fade, text, color in zip(self.x[:n].tolist(), y.tolist(), fades.tolist(), self.text[:n], self.color[:n]):
+            surface.blit(text_cache.render(text, 'small', color, alpha=fade), (x, y))
 
 class ScreenShake:
-    def __init__(self):
+    def __init__(self, rng=None):
         self.duration = 0
         self.intensity = 0
+        self.rng = rng or random.Random()
 
     def start(self, duration, intensity):
         self.duration = duration
@@ -175,7 +350,7 @@ class ScreenShake:
     def update(self):
         if self.duration > 0:
             self.duration -= 1
-            ox = random.uniform(-self.intensity, self.intensity)
-            oy = random.uniform(-self.intensity, self.intensity)
+            ox = self.rng.uniform(-self.intensity, self.intensity)
+            oy = self.rng.uniform(-self.intensity, self.intensity)
             return ox, oy
         return 0, 0
@@ -1,144 +1,271 @@
 
+import os
+import json
+import bisect
+import itertools
 import pygame
-import random
-import math
-
-class Enemy:
-    def __init__(self, x, y, enemy_type='basic'):
-        self.x = x
-        self.y = y
-        self.type = enemy_type
-        self.width = 40
-        self.height = 40
-        self.rect = pygame.Rect(x, y, self.width, self.height)
-        self.active = True
-        self.max_health = 20
-        self.health = self.max_health
-        
-        # Base stats
-        if self.type == 'basic':
-            self.speed_y = 2
-            self.speed_x = 0
-            self.color = (255, 100, 100)
-            self.health = 20
-        elif self.type == 'fast':
-            self.speed_y = 4
-            self.speed_x = 0
-            self.color = (255, 200, 50)
-            self.health = 10
-            self.width = 30
-            self.height = 30
-        elif self.type == 'sine':
-            self.speed_y = 1.5
-            self.speed_x = 0
-            self.color = (200, 100, 255)
-            self.health = 30
-            self.initial_x = x
-            self.t = 0
-        elif self.type == 'tank':
-            self.speed_y = 1
-            self.speed_x = 0
-            self.color = (150, 150, 150)
-            self.health = 80
-            self.width = 60
-            self.height = 60
-        elif self.type == 'vanguard':
-            self.speed_y = 2
-            self.speed_x = 0
-            self.color = (255, 50, 50)
-            self.health = 30
-            self.last_shot = 0
-            self.shoot_delay = 2000 # ms
-        elif self.type == 'hunter':
-            self.speed_y = 2.5
-            self.speed_x = 0
-            self.color = (50, 255, 200) # Cyan/Teal
-            self.health = 25
-            self.width = 35
-            self.height = 35
-            
-        self.rect.width = self.width
-        self.rect.height = self.height
-
-    def update(self, slow_active=False, player_rect=None):
+import numpy as np
+from entities import Archetype, DIRECT_MAX_ROWS
+from spatial_hash import SpatialHash
+from sprite_cache import sprites
+from render_targets import new_surface
+
+ENEMY_DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets", "enemies.json")
+
+# Lateral movement models, each applied to all rows of one type at once.
+# Every enemy also descends by its speed; `left` is the rect before this update.
+def move_sine(field, rows, params, speed_modifier, player_rect, left):
+    field.t[rows] += params['phase_step']
+    field.x[rows] = field.initial_x[rows] + np.sin(field.t[rows]) * params['amplitude']
+
+def move_track(field, rows, params, speed_modifier, player_rect, left):
+    # Move towards player x
+    if player_rect is None: return
+    centerx = left[rows] + field.width[rows] // 2
+    field.x[rows] += np.sign(player_rect.centerx - centerx) * params['rate'] * speed_modifier
+
+MOVEMENT_MODELS = {'straight': None, 'sine': move_sine, 'track': move_track}
+
+# Firing models, on simulation time so replays fire on the same frames
+def fire_periodic(field, rows, params, left, bottom, bullets, time_ms):
+    due = rows[time_ms - field.last_shot[rows] > params['delay_ms']]
+    centerx = left[due] + field.width[due] // 2
+    for x, y in zip(centerx.tolist(), bottom[due].tolist()):
+        bullets.emit(x, y, speed=params['speed'], bullet_type=params['bullet'])
+    field.last_shot[due] = time_ms
+
+FIRING_MODELS = {'periodic': fire_periodic}
+
+class EnemyType:
+    """One archetype from the data file, with its behaviour models resolved to functions."""
+    __slots__ = ('id', 'name', 'health', 'speed', 'width', 'height', 'color', 'look',
+                 'move', 'move_params', 'fire', 'fire_params', 'from_level', 'chance')
+
+    def __init__(self, type_id, name, spec):
+        self.id = type_id
+        self.name = name
+        self.health = spec['health']
+        self.speed = spec['speed']
+        self.width, self.height = spec['size']
+        self.color = tuple(spec['color'])
+        self.look = spec['look']
+        self.move_params = spec['movement']
+        self.move = MOVEMENT_MODELS[self.move_params['model']]
+        self.fire_params = spec['firing']
+        self.fire = FIRING_MODELS[self.fire_params['model']] if self.fire_params else None
+        spawn = spec['spawn'] or {}
+        self.from_level = spawn.get('from_level', 1)
+        self.chance = spawn.get('chance', 0)
+
+def load_enemy_types(path=ENEMY_DATA):
+    """Returns {name: EnemyType} in file order (a type's id is its position) and the fallback type."""
+    with open(path) as f:
+        data = json.load(f)
+    types = {name: EnemyType(i, name, spec) for i, (name, spec) in enumerate(data['types'].items())}
+    if data['fallback'] not in types:
+        raise ValueError(f"{path}: fallback type {data['fallback']!r} is not defined")
+    return types, data['fallback']
+
+ENEMY_TYPES, FALLBACK_TYPE = load_enemy_types()
+ARCHETYPES = list(ENEMY_TYPES.values()) # Indexed by type id
+TYPE_IDS = {name: kind.id for name, kind in ENEMY_TYPES.items()}
+BEHAVING = [kind for kind in ARCHETYPES if kind.move or kind.fire] # Types with per-frame models to run
+
+def spawn_table(level):
+    """
+    Cumulative spawn chances of the types unlocked at `level`, in file order:
+    a roll r in [0, 1) picks `names[bisect_right(edges, r)]`, and rolls past
+    the last edge pick the fallback type.
+    """
+    edges, names = [], []
+    for kind in ARCHETYPES:
+        if kind.chance and level >= kind.from_level:
+            edges.append((edges[-1] if edges else 0.0) + kind.chance)
+            names.append(kind.name)
+    return edges, names + [FALLBACK_TYPE]
+
+def pick_type(table, roll):
+    edges, names = table
+    return names[bisect.bisect_right(edges, roll)]
+
+class EnemyField(Archetype):
+    """
+    Every regular enemy as one archetype. All of them descend together, then
+    each enemy type's movement and firing model runs once over that type's
+    rows. Positions are floats and the integer rect is derived from them,
+    as `int(x)` like the old per-enemy Rect.
+    """
+    def __init__(self, capacity=64):
+        super().__init__({
+            'x': np.float64, 'y': np.float64, 'px': np.float64, 'py': np.float64,
+            'speed_y': np.float64, 'health': np.int32, 'width': np.int32, 'height': np.int32,
+            'type': np.int8, 'active': np.bool_,
+            't': np.float64, 'initial_x': np.float64, 'last_shot': np.float64, # Movement and firing model state
+        }, capacity)
+        self._bounds = self._centers = None # Derived rects, kept until the enemies move or rows change
+        self.grid = SpatialHash(cell_size=80) # Broad-phase over the rects, rebuilt on demand after a move
+        self._grid_stale = True
+        self.type_counts = [0] * len(ARCHETYPES) # Live rows per type id
+
+    def _moved(self):
+        self._bounds = self._centers = None
+        self._grid_stale = True
+
+    def add(self, x, y, enemy_type=FALLBACK_TYPE):
+        kind = ENEMY_TYPES[enemy_type]
+        self._moved()
+        self.type_counts[kind.id] += 1
+        return self.spawn(x=x, y=y, px=x, py=y, initial_x=x, speed_y=kind.speed, health=kind.health,
+                          width=kind.width, height=kind.height, type=kind.id, active=True)
+
+    def bounds(self):
+        """Integer (left, top, right, bottom) arrays of the live rows, computed once per move."""
+        if self._bounds is None:
+            n = self.count
+            left = self.x[:n].astype(np.int64)
+            top = self.y[:n].astype(np.int64)
+            self._bounds = (left, top, left + self.width[:n], top + self.height[:n])
+        return self._bounds
+
+    def centers(self):
+        if self._centers is None:
+            left, top, _, _ = self.bounds()
+            self._centers = (left + self.width[:self.count] // 2, top + self.height[:self.count] // 2)
+        return self._centers
+
+    def center(self, row):
+        left, top, _, _ = self.bounds()
+        return int(left[row]) + int(self.width[row]) // 2, int(top[row]) + int(self.height[row]) // 2
+
+    def index(self):
+        """The broad-phase grid over `bounds()`; cells are binned only if a query needs them."""
+        if self._grid_stale:
+            self.grid.rebuild(*self.bounds())
+            self._grid_stale = False
+        return self.grid
+
+    def touching(self, rect):
+        """Rows of live enemies overlapping `rect`, ascending."""
+        if self.count == 0: return []
+        left, top, right, bottom = self.bounds()
+        if max(bottom.tolist()) <= rect.top: return [] # The usual case: every enemy is still above `rect`
+        hit = self.active[:self.count] & (left < rect.right) & (right > rect.left) & (top < rect.bottom) & (bottom > rect.top)
+        return np.flatnonzero(hit).tolist()
+
+    def within(self, x, y, radius):
+        """Rows of live enemies whose center is closer than `radius` to (x, y), ascending."""
+        if self.count == 0: return []
+        centerx, centery = self.centers()
+        hit = self.active[:self.count] & (np.hypot(centerx - x, centery - y) < radius)
+        return np.flatnonzero(hit).tolist()
+
+    def update(self, slow_active=False, player_rect=None, bullets=None, time_ms=0):
+        n = self.count
+        if n == 0: return
+        counts = self.type_counts
+        present = [kind for kind in BEHAVING if counts[kind.id]]
+        if present:
+            left, _, _, bottom = self.bounds() # Rects as of the last update, which aiming and firing use
         speed_modifier = 0.5 if slow_active else 1.0
-        new_bullets = []
-        
-        if self.type == 'sine':
-            self.y += self.speed_y * speed_modifier
-            self.t += 0.05
-            self.x = self.initial_x + math.sin(self.t) * 50
-        elif self.type == 'vanguard':
-            self.y += self.speed_y * speed_modifier
-            # Shoot logic
-            current_time = pygame.time.get_ticks()
-            if current_time - self.last_shot > self.shoot_delay:
-                from bullet import Bullet
-                new_bullets.append(Bullet(self.rect.centerx, self.rect.bottom, speed=5, color=(255, 100, 0)))
-                self.last_shot = current_time
-        elif self.type == 'hunter':
-            self.y += self.speed_y * speed_modifier
-            if player_rect:
-                # Move towards player x
-                if self.rect.centerx < player_rect.centerx: self.x += 1 * speed_modifier
-                elif self.rect.centerx > player_rect.centerx: self.x -= 1 * speed_modifier
+        if n <= DIRECT_MAX_ROWS:
+            x, y, px, py, speed_y = self.x, self.y, self.px, self.py, self.speed_y
+            for i in range(n):
+                px[i] = x[i]
+                py[i] = y[i]
+                y[i] += speed_y[i] * speed_modifier
+        else:
+            self.px[:n] = self.x[:n]
+            self.py[:n] = self.y[:n]
+            self.y[:n] += self.speed_y[:n] * speed_modifier
+
+        if present:
+            # Rows grouped by type in one sort; each group keeps ascending row order
+            order = np.argsort(self.type[:n], kind='stable')
+            ends = list(itertools.accumulate(counts))
+            for kind in present:
+                rows = order[ends[kind.id] - counts[kind.id]:ends[kind.id]]
+                if kind.move:
+                    kind.move(self, rows, kind.move_params, speed_modifier, player_rect, left)
+                if kind.fire and bullets is not None:
+                    kind.fire(self, rows, kind.fire_params, left, bottom, bullets, time_ms)
+
+        if n <= DIRECT_MAX_ROWS:
+            for i, y in enumerate(self.y[:n].tolist()):
+                if y > 1000: self.active[i] = False
         else:
-            self.y += self.speed_y * speed_modifier
-            self.x += self.speed_x * speed_modifier
-            
-        self.rect.x = int(self.x)
-        self.rect.y = int(self.y)
-        
-        if self.y > 1000:
-            self.active = False
-            
-        return new_bullets
-
-    def take_damage(self, amount):
-        self.health -= amount
-        if self.health <= 0:
-            self.active = False
+            self.active[:n] &= self.y[:n] <= 1000
+        self._moved()
+
+    def take_damage(self, row, amount):
+        self.health[row] -= amount
+        if self.health[row] <= 0:
+            self.active[row] = False
             return True # Dead
         return False
 
-    def draw(self, surface):
-        if not self.active: return
-        
-        # Draw soft glow
-        glow_surf = pygame.Surface((self.width + 20, self.height + 20), pygame.SRCALPHA)
-        pygame.draw.circle(glow_surf, (*self.color, 50), (self.width//2 + 10, self.height//2 + 10), self.width//2 + 10)
-        surface.blit(glow_surf, (self.x - 10, self.y - 10))
-        
-        # Draw Enemy Shape
-        if self.type == 'basic':
-            pygame.draw.rect(surface, self.color, self.rect, border_radius=5)
-        elif self.type == 'fast':
-            points = [
-                (self.rect.centerx, self.rect.bottom),
-                (self.rect.left, self.rect.top),
-                (self.rect.right, self.rect.top)
-            ]
-            pygame.draw.polygon(surface, self.color, points)
-        elif self.type == 'sine':
-             pygame.draw.circle(surface, self.color, self.rect.center, self.width//2)
-        elif self.type == 'tank':
-            pygame.draw.rect(surface, self.color, self.rect, border_radius=10)
-            pygame.draw.rect(surface, (200, 200, 200), (self.rect.x+10, self.rect.y+10, self.width-20, self.height-20), 2)
-        elif self.type == 'vanguard':
-            points = [
-                (self.rect.left, self.rect.top),
-                (self.rect.right, self.rect.top),
-                (self.rect.centerx, self.rect.bottom)
-            ]
-            pygame.draw.polygon(surface, self.color, points)
-            pygame.draw.circle(surface, (255, 255, 255), self.rect.center, 5) # Core
-        elif self.type == 'hunter':
-            # Diamond shape or spiked circle
-            points = [
-                (self.rect.centerx, self.rect.top),
-                (self.rect.right, self.rect.centery),
-                (self.rect.centerx, self.rect.bottom),
-                (self.rect.left, self.rect.centery)
-            ]
-            pygame.draw.polygon(surface, self.color, points)
-            pygame.draw.rect(surface, (255, 255, 255), (self.rect.centerx-2, self.rect.centery-2, 4, 4))
+    def remove_where(self, mask):
+        n = self.count
+        if n == 0: return
+        gone = np.bincount(self.type[:n][mask[:n]], minlength=len(ARCHETYPES)).tolist()
+        self.type_counts = [have - lost for have, lost in zip(self.type_counts, gone)]
+        super().remove_where(mask)
+        self._moved()
+
+    def clear(self):
+        super().clear()
+        self.type_counts = [0] * len(ARCHETYPES)
+        self._moved()
+
+    def draw(self, surface, alpha=1.0):
+        n = self.count
+        if n == 0: return
+        idx = np.flatnonzero(self.active[:n])
+        types = self.type[idx]
+        looks = [sprites.get('enemy', kind.look, kind.color, (kind.width, kind.height)) for kind in ARCHETYPES]
+        off = np.array([offset for _, offset in looks], dtype=np.int64)[types]
+        x, y = self.x[idx], self.y[idx]
+        if alpha < 1.0:
+            x = x - (x - self.px[idx]) * (1 - alpha)
+            y = y - (y - self.py[idx]) * (1 - alpha)
+        xs = x.astype(np.int64) + off[:, 0]
+        ys = y.astype(np.int64) + off[:, 1]
+        surfaces = [surf for surf, _ in looks]
+        surface.blits([(surfaces[t], (x, y)) for t, x, y in zip(types.tolist(), xs.tolist(), ys.tolist())], doreturn=False)
+
+def bake_enemy(look, color, size, angle):
+    width, height = size
+    surf = new_surface((width + 20, height + 20), pygame.SRCALPHA)
+    rect = pygame.Rect(10, 10, width, height)
+
+    # Soft glow
+    pygame.draw.circle(surf, (*color, 50), rect.center, width//2 + 10)
+
+    # Enemy Shape
+    if look == 'box':
+        pygame.draw.rect(surf, color, rect, border_radius=5)
+    elif look in ('dart', 'cored_dart'):
+        points = [
+            (rect.centerx, rect.bottom),
+            (rect.left, rect.top),
+            (rect.right, rect.top)
+        ]
+        pygame.draw.polygon(surf, color, points)
+        if look == 'cored_dart':
+            pygame.draw.circle(surf, (255, 255, 255), rect.center, 5) # Core
+    elif look == 'orb':
+         pygame.draw.circle(surf, color, rect.center, width//2)
+    elif look == 'plated_box':
+        pygame.draw.rect(surf, color, rect, border_radius=10)
+        pygame.draw.rect(surf, (200, 200, 200), (rect.x+10, rect.y+10, width-20, height-20), 2)
+    elif look == 'diamond':
+        points = [
+            (rect.centerx, rect.top),
+            (rect.right, rect.centery),
+            (rect.centerx, rect.bottom),
+            (rect.left, rect.centery)
+        ]
+        pygame.draw.polygon(surf, color, points)
+        pygame.draw.rect(surf, (255, 255, 255), (rect.centerx-2, rect.centery-2, 4, 4))
+    return surf, (-10, -10)
+
+sprites.register('enemy', bake_enemy)
@@ -0,0 +1,101 @@
+import numpy as np
+
+# Up to this many rows, a plain Python loop over the rows beats NumPy, whose
+# fixed cost per call (about a microsecond) dominates at a handful of entities
+DIRECT_MAX_ROWS = 8
+
+class Archetype:
+    """
+    Storage for one kind of entity, column-wise: every component is a NumPy
+    array and live entities occupy rows [0, count), so systems run over a
+    whole component at once. Each entity gets a stable id at spawn and
+    `row_of` maps ids to their current row. Removal is swap-remove (rows
+    from the end fill the holes), which keeps the columns dense without
+    shifting everything after a removed row; row order is therefore not
+    spawn order. Hot paths switch to per-row Python at or below
+    DIRECT_MAX_ROWS, which is the usual case in play.
+    """
+    def __init__(self, components, capacity=64):
+        self.components = dict(components) # name -> dtype
+        self.defaults = {name: np.zeros(1, dtype=dtype)[0] for name, dtype in self.components.items()}
+        self.count = 0
+        self.capacity = 0
+        self.next_id = 0
+        self.row_of = {}
+        self.ids = None
+        for name in self.components:
+            setattr(self, name, None)
+        self._grow(capacity)
+
+    def _grow(self, capacity):
+        for name, dtype in [('ids', np.int64)] + list(self.components.items()):
+            new = np.zeros(capacity, dtype=dtype)
+            old = getattr(self, name)
+            if old is not None:
+                new[:self.count] = old[:self.count]
+            setattr(self, name, new)
+        self.capacity = capacity
+
+    def __len__(self):
+        return self.count
+
+    def allocate(self):
+        """
+        Claims the next row for a new entity and returns (id, row). The row
+        still holds a removed entity's values, so the caller must set every
+        component; `spawn` is the convenient form.
+        """
+        if self.count == self.capacity:
+            self._grow(self.capacity * 2)
+        row = self.count
+        entity = self.next_id
+        self.next_id += 1
+        self.ids[row] = entity
+        self.row_of[entity] = row
+        self.count += 1
+        return entity, row
+
+    def spawn(self, **values):
+        """Adds an entity (unlisted components start at zero) and returns its id."""
+        entity, row = self.allocate()
+        for name, default in self.defaults.items():
+            getattr(self, name)[row] = values.get(name, default)
+        return entity
+
+    def remove_where(self, mask):
+        """Swap-removes every row where `mask` (length `count`) is true."""
+        n = self.count
+        if n == 0: return
+        dead = np.flatnonzero(mask[:n])
+        if len(dead) == 0: return
+        k = n - len(dead)
+        # Live rows past the new end move into the holes before it
+        holes = dead[dead < k]
+        movers = np.flatnonzero(~mask[k:n]) + k
+        for name in self.defaults:
+            arr = getattr(self, name)
+            arr[holes] = arr[movers]
+        row_of = self.row_of
+        for entity in self.ids[dead].tolist():
+            del row_of[entity]
+        self.ids[holes] = self.ids[movers]
+        for row, entity in zip(holes.tolist(), self.ids[holes].tolist()):
+            row_of[entity] = row
+        self.count = k
+
+    def remove_inactive(self):
+        """For archetypes with an `active` component: swap-removes the inactive rows."""
+        n = self.count
+        if n == 0: return
+        active = self.active[:n]
+        if (all(active.tolist()) if n <= DIRECT_MAX_ROWS else active.all()): return
+        self.remove_where(~active)
+
+    def remove(self, entity):
+        mask = np.zeros(self.count, dtype=np.bool_)
+        mask[self.row_of[entity]] = True
+        self.remove_where(mask)
+
+    def clear(self):
+        self.count = 0
+        self.row_of = {}
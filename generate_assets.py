@@ -1,165 +1,173 @@
+"""
+Synthesizes the game's sound effects and music as WAV files.
 
-import wave
-import math
-import struct
-import random
+    python generate_assets.py                 # into assets/sounds
+    python generate_assets.py --out build/sounds --force
+
+Each asset is built by a NumPy waveform builder from the parameters in
+ASSETS. A manifest in the output directory records a hash of every
+asset's builder and parameters; assets whose hash still matches (and
+whose file exists) are skipped, the rest are built in parallel.
+"""
 import os
+import json
+import wave
+import inspect
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor
 
-def create_dir(path):
-    if not os.path.exists(path):
-        os.makedirs(path)
+import numpy as np
 
-# Parameters
 SAMPLE_RATE = 44100
-
-def generate_tone(frequency, duration, volume=0.5):
-    n_samples = int(SAMPLE_RATE * duration)
-    data = []
-    for i in range(n_samples):
-        # Sine wave
-        value = math.sin(2 * math.pi * frequency * i / SAMPLE_RATE)
-        # Add basic decay for some sounds
-        amp = volume * 32767
-        data.append(int(value * amp))
-    return data
-
-def generate_noise(duration, volume=0.5):
-    n_samples = int(SAMPLE_RATE * duration)
-    data = []
-    for i in range(n_samples):
-        value = random.uniform(-1, 1)
-        amp = volume * 32767 * (1 - (i/n_samples)) # Decay
-        data.append(int(value * amp))
-    return data
-
-def generate_music_loop(duration=10):
-    # Simple Arpeggio C Major: C, E, G
-    notes = [261.63, 329.63, 392.00, 523.25] # C4, E4, G4, C5
-    tempo = 0.2
-    data = []
-    
-    total_samples = int(SAMPLE_RATE * duration)
-    current_sample = 0
-    
-    while current_sample < total_samples:
-        for note in notes:
-            # Generate shorter notes
-            n_samples = int(SAMPLE_RATE * tempo)
-            for i in range(n_samples):
-                t = i / SAMPLE_RATE
-                # Sawtooth-ish wave for retro feel
-                value = (2 * (t * note - math.floor(0.5 + t * note))) 
-                amp = 0.2 * 32767
-                data.append(int(value * amp))
-            current_sample += n_samples
-            if current_sample >= total_samples: break
-            
-    return data[:total_samples]
-
-def save_wav(filename, data):
-    with wave.open(filename, 'w') as f:
-        f.setnchannels(1) # Mono
-        f.setsampwidth(2) # 2 bytes (16-bit)
+MANIFEST = "manifest.json"
+DEFAULT_OUT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets", "sounds")
+
+def samples(duration):
+    """Sample indices and normalized time (0..1) for a clip of `duration` seconds."""
+    n = int(SAMPLE_RATE * duration)
+    i = np.arange(n, dtype=np.float64)
+    return i, i / n
+
+def sweep(duration, volume, start, end, noise=0.0, seed=0):
+    """Sine whose frequency slides from `start` to `end`, with optional noise, fading out."""
+    i, t = samples(duration)
+    freq = start + (end - start) * t
+    val = np.sin(2 * np.pi * freq * i / SAMPLE_RATE)
+    if noise:
+        val += np.random.default_rng(seed).uniform(-noise, noise, len(i))
+    return val * volume * (1 - t)
+
+def noise_burst(duration, volume, seed=0):
+    i, t = samples(duration)
+    return np.random.default_rng(seed).uniform(-1, 1, len(i)) * volume * (1 - t)
+
+def chime(duration, volume, vibrato_rate, vibrato_depth):
+    """Rising tone with vibrato."""
+    i, t = samples(duration)
+    freq = 400 + t * 400 + np.sin(t * vibrato_rate) * vibrato_depth
+    return np.sin(2 * np.pi * freq * i / SAMPLE_RATE) * volume * (1 - t)
+
+def thud(duration, volume, grit, seed=0):
+    """Falling low tone where a `grit` share of samples is replaced by noise."""
+    i, t = samples(duration)
+    val = np.sin(2 * np.pi * (150 - t * 100) * i / SAMPLE_RATE)
+    rng = np.random.default_rng(seed)
+    gritty = rng.random(len(i)) > 1 - grit
+    val[gritty] = rng.uniform(-1, 1, int(gritty.sum()))
+    return val * volume * (1 - t)
+
+def pulse_fall(duration, volume, pulse_rate):
+    """Descending tone with a tremolo, for the game over cue."""
+    i, t = samples(duration)
+    val = np.sin(2 * np.pi * (300 - t * 250) * i / SAMPLE_RATE)
+    val *= 0.5 + 0.5 * np.sin(t * pulse_rate)
+    return val * volume * (1 - t)
+
+def rumble(duration, volume, noise, seed=0):
+    """Wobbling low sweep with noise, for the boss entrance."""
+    i, t = samples(duration)
+    freq = 100 + np.sin(t * 5) * 50
+    val = np.sin(2 * np.pi * freq * i / SAMPLE_RATE)
+    val += np.random.default_rng(seed).uniform(-noise, noise, len(i))
+    return val * volume * (1 - t * 0.5)
+
+def arpeggio(duration, volume, notes):
+    """Notes one after another, each fading out over its share of `duration`."""
+    n = int(SAMPLE_RATE * duration / len(notes))
+    i = np.arange(n, dtype=np.float64)
+    return np.concatenate([np.sin(2 * np.pi * note * i / SAMPLE_RATE) * volume * (1 - i / n) for note in notes])
+
+def beep(duration, volume, freq, on):
+    """A tone for the first `on` share of the clip, then silence."""
+    i, t = samples(duration)
+    return np.where(t < on, np.sin(2 * np.pi * freq * i / SAMPLE_RATE) * volume, 0.0)
+
+def saw_loop(duration, volume, notes, tempo):
+    """Sawtooth notes of `tempo` seconds each, cycling for `duration` seconds."""
+    total = int(SAMPLE_RATE * duration)
+    per_note = int(SAMPLE_RATE * tempo)
+    i = np.arange(total)
+    t = (i % per_note) / SAMPLE_RATE
+    note = np.asarray(notes)[(i // per_note) % len(notes)]
+    return 2 * (t * note - np.floor(0.5 + t * note)) * volume
+
+# file name -> (builder, parameters). Noisy builders take a seed so a rebuild is reproducible.
+ASSETS = {
+    'shoot.wav': (sweep, {'duration': 0.1, 'volume': 0.4, 'start': 1200, 'end': 400, 'noise': 0.1, 'seed': 1}),
+    'explosion.wav': (noise_burst, {'duration': 0.6, 'volume': 0.7, 'seed': 2}),
+    'powerup.wav': (chime, {'duration': 0.4, 'volume': 0.5, 'vibrato_rate': 20, 'vibrato_depth': 50}),
+    'damage.wav': (thud, {'duration': 0.2, 'volume': 0.6, 'grit': 0.2, 'seed': 3}),
+    'game_over.wav': (pulse_fall, {'duration': 1.0, 'volume': 0.5, 'pulse_rate': 30}),
+    'boss_enter.wav': (rumble, {'duration': 1.5, 'volume': 0.7, 'noise': 0.2, 'seed': 4}),
+    'level_complete.wav': (arpeggio, {'duration': 0.8, 'volume': 0.5, 'notes': [440, 554, 659, 880]}), # A major
+    'low_health.wav': (beep, {'duration': 0.5, 'volume': 0.3, 'freq': 600, 'on': 0.2}),
+    'bg_music.wav': (saw_loop, {'duration': 16.0, 'volume': 0.2, 'notes': [261.63, 329.63, 392.00, 523.25], 'tempo': 0.2}), # C4 E4 G4 C5
+}
+
+def asset_hash(name):
+    """Hash of everything that shapes the file: builder source, parameters and sample rate."""
+    builder, params = ASSETS[name]
+    key = json.dumps({'builder': inspect.getsource(builder), 'params': params, 'rate': SAMPLE_RATE}, sort_keys=True)
+    return hashlib.sha256(key.encode()).hexdigest()
+
+def save_wav(path, data):
+    # Truncate toward zero like int() did, as 16-bit little-endian mono
+    pcm = (data * 32767).astype('<i2')
+    with wave.open(path, 'wb') as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
         f.setframerate(SAMPLE_RATE)
-        # Convert to bytes
-        packed_data = struct.pack('<' + ('h' * len(data)), *data)
-        f.writeframes(packed_data)
-    print(f"Generated {filename}")
+        f.writeframes(pcm.tobytes())
+
+def build(job):
+    """Builds one asset into `out`. Runs in a worker process."""
+    name, out = job
+    builder, params = ASSETS[name]
+    save_wav(os.path.join(out, name), builder(**params))
+    return name
+
+def load_manifest(out):
+    try:
+        with open(os.path.join(out, MANIFEST)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_manifest(out, manifest):
+    path = os.path.join(out, MANIFEST)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(path + '.tmp', path)
 
 def main():
-    base_path = "d:/game/space_shooter/assets/sounds"
-    create_dir(base_path)
-
-    # 1. Shoot Sound (Shorter, crisp kick)
-    shoot_data = []
-    duration = 0.1
-    for i in range(int(SAMPLE_RATE * duration)):
-        freq = 1200 - (i / (SAMPLE_RATE * duration)) * 800 
-        val = math.sin(2 * math.pi * freq * i / SAMPLE_RATE)
-        # Add a bit of noise for texture
-        val += random.uniform(-0.1, 0.1)
-        shoot_data.append(int(val * 0.4 * 32767 * (1 - i/(SAMPLE_RATE * duration))))
-    save_wav(f"{base_path}/shoot.wav", shoot_data)
-
-    # 2. Explosion (Stronger Noise decay)
-    exp_data = generate_noise(0.6, 0.7)
-    save_wav(f"{base_path}/explosion.wav", exp_data)
-
-    # 3. Powerup (Rising complex chime)
-    pup_data = []
-    duration = 0.4
-    for i in range(int(SAMPLE_RATE * duration)):
-        t = i / (SAMPLE_RATE * duration)
-        freq = 400 + t * 400 + math.sin(t * 20) * 50 # Vibrato rising
-        val = math.sin(2 * math.pi * freq * i / SAMPLE_RATE)
-        pup_data.append(int(val * 0.5 * 32767 * (1 - t)))
-    save_wav(f"{base_path}/powerup.wav", pup_data)
-
-    # 4. Damage Sound (Low thud)
-    dmg_data = []
-    duration = 0.2
-    for i in range(int(SAMPLE_RATE * duration)):
-        t = i / (SAMPLE_RATE * duration)
-        freq = 150 - t * 100
-        val = math.sin(2 * math.pi * freq * i / SAMPLE_RATE)
-        # Add grit
-        if random.random() > 0.8: val = random.uniform(-1, 1)
-        dmg_data.append(int(val * 0.6 * 32767 * (1 - t)))
-    save_wav(f"{base_path}/damage.wav", dmg_data)
-
-    # 5. Game Over (Descending fail tone)
-    go_data = []
-    duration = 1.0
-    for i in range(int(SAMPLE_RATE * duration)):
-        t = i / (SAMPLE_RATE * duration)
-        freq = 300 - t * 250
-        val = math.sin(2 * math.pi * freq * i / SAMPLE_RATE)
-        # Pulse effect
-        val *= (0.5 + 0.5 * math.sin(t * 30))
-        go_data.append(int(val * 0.5 * 32767 * (1 - t)))
-    save_wav(f"{base_path}/game_over.wav", go_data)
-
-    # 6. Boss Enter (Dramatic sweep)
-    boss_data = []
-    duration = 1.5
-    for i in range(int(SAMPLE_RATE * duration)):
-        t = i / (SAMPLE_RATE * duration)
-        freq = 100 + math.sin(t * 5) * 50
-        val = math.sin(2 * math.pi * freq * i / SAMPLE_RATE)
-        # Low rumble noise
-        val += random.uniform(-0.2, 0.2)
-        boss_data.append(int(val * 0.7 * 32767 * (1 - t*0.5)))
-    save_wav(f"{base_path}/boss_enter.wav", boss_data)
-
-    # 7. Level Complete (Victory chime)
-    win_data = []
-    duration = 0.8
-    notes = [440, 554, 659, 880] # A Major arpeggio
-    samples_per_note = int(SAMPLE_RATE * duration / len(notes))
-    for note in notes:
-        for i in range(samples_per_note):
-            t = i / samples_per_note
-            val = math.sin(2 * math.pi * note * i / SAMPLE_RATE)
-            win_data.append(int(val * 0.5 * 32767 * (1 - t)))
-    save_wav(f"{base_path}/level_complete.wav", win_data)
-
-    # 9. Low Health Alarm (Periodic beep)
-    alarm_data = []
-    duration = 0.5
-    for i in range(int(SAMPLE_RATE * duration)):
-        t = i / (SAMPLE_RATE * duration)
-        freq = 600
-        # Beep for 0.1s, silence for 0.4s
-        if t < 0.2:
-            val = math.sin(2 * math.pi * freq * i / SAMPLE_RATE)
-            alarm_data.append(int(val * 0.3 * 32767))
-        else:
-            alarm_data.append(0)
-    save_wav(f"{base_path}/low_health.wav", alarm_data)
-
-    # 10. Background Music (Updated Arpeggio Loop)
-    music_data = generate_music_loop(16.0) 
-    save_wav(f"{base_path}/bg_music.wav", music_data)
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--out", default=DEFAULT_OUT, help="output directory (default: assets/sounds next to this script)")
+    parser.add_argument("--force", action="store_true", help="rebuild every asset even if the manifest says it is current")
+    parser.add_argument("--workers", type=int, help="worker processes (default: one per core; 1 builds in-process)")
+    args = parser.parse_args()
+
+    os.makedirs(args.out, exist_ok=True)
+    manifest = {} if args.force else load_manifest(args.out)
+    hashes = {name: asset_hash(name) for name in ASSETS}
+    stale = [name for name in ASSETS
+             if manifest.get(name) != hashes[name] or not os.path.exists(os.path.join(args.out, name))]
+    if not stale:
+        print(f"All {len(ASSETS)} assets in {args.out} are up to date")
+        return
+
+    workers = min(args.workers or os.cpu_count() or 1, len(stale))
+    jobs = [(name, args.out) for name in stale]
+    if workers == 1:
+        built = list(map(build, jobs))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            built = list(executor.map(build, jobs))
+    for name in built:
+        manifest[name] = hashes[name]
+        print(f"Generated {os.path.join(args.out, name)}")
+    save_manifest(args.out, manifest)
+    print(f"Built {len(built)} of {len(ASSETS)} assets ({len(ASSETS) - len(built)} up to date)")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,150 @@
+import pygame
+import numpy as np
+from render_targets import new_surface
+
+class DisplayList:
+    """
+    Stand-in target for UI draw calls: records every blit instead of
+    performing it, so the same drawing code can be replayed later.
+    """
+    def __init__(self, size):
+        self.size = size
+        self.ops = []
+
+    def get_size(self):
+        return self.size
+
+    def get_width(self):
+        return self.size[0]
+
+    def get_height(self):
+        return self.size[1]
+
+    def blit(self, source, dest, area=None, special_flags=0):
+        if area is None and special_flags == 0:
+            self.ops.append((source, dest))
+        else:
+            self.ops.append((source, dest, area, special_flags))
+
+class Widget:
+    """
+    A retained piece of the HUD. `render(target, value)` is only re-run when
+    the bound value changes; every other frame replays the recorded blits.
+    Its return value is kept and handed back by every `draw`.
+    """
+    def __init__(self, name, render):
+        self.name = name
+        self.render = render
+        self.value = None
+        self.ops = None
+        self.result = None
+        self.renders = 0
+
+    def invalidate(self):
+        self.ops = None
+
+    def draw(self, surface, value):
+        if self.ops is None or value != self.value:
+            recorder = DisplayList(surface.get_size())
+            self.result = self.render(recorder, value)
+            self.ops = recorder.ops
+            self.value = value
+            self.renders += 1
+        if self.ops:
+            surface.blits(self.ops, doreturn=False)
+        return self.result
+
+class HUD:
+    """In-game overlay (score, health, credits, EMP, combo, boss bar, touch buttons, level banner) built from retained widgets."""
+    def __init__(self, ui):
+        self.ui = ui
+        self.widgets = [
+            Widget('score', lambda s, v: ui.draw_score_panel(s, *v)),
+            Widget('health', lambda s, v: ui.draw_health_panel(s, *v)),
+            Widget('credits', lambda s, v: ui.draw_credits(s, v)),
+            # Bound to the bar's pixel fill, not the raw energy that creeps up every frame
+            Widget('emp', lambda s, v: ui.draw_emp(s, v, 100)),
+            Widget('combo', lambda s, v: ui.draw_combo(s, v)),
+            Widget('boss', self._draw_boss),
+            Widget('touch', lambda s, v: ui.draw_touch_controls(s)),
+            Widget('level_banner', lambda s, v: ui.draw_level_overlay(s, v)),
+        ]
+        self.by_name = {w.name: w for w in self.widgets}
+
+    def _draw_boss(self, surface, value):
+        if value:
+            self.ui.draw_boss_bar(surface, *value)
+
+    def draw(self, surface, player, level_manager, credits=0, combo=1):
+        w = self.by_name
+        w['score'].draw(surface, (player.score, level_manager.level))
+        w['health'].draw(surface, (player.health, player.max_health))
+        w['credits'].draw(surface, credits)
+        w['emp'].draw(surface, int(player.emp_energy / player.emp_max_energy * 100))
+        w['combo'].draw(surface, combo)
+        boss = level_manager.boss
+        w['boss'].draw(surface, (boss.health, boss.max_health) if boss and boss.active else None)
+
+    def draw_touch_controls(self, surface):
+        """Draws the on-screen buttons and returns their rects."""
+        return self.by_name['touch'].draw(surface, surface.get_size())
+
+    def draw_level_banner(self, surface, level):
+        self.by_name['level_banner'].draw(surface, level)
+
+    def invalidate(self):
+        for widget in self.widgets:
+            widget.invalidate()
+
+    def render_counts(self):
+        """How many times each widget actually re-rendered."""
+        return {widget.name: widget.renders for widget in self.widgets}
+
+def premultiplied(surface):
+    """Copy of `surface` with color channels scaled by alpha, for BLEND_PREMULTIPLIED blits."""
+    out = surface.convert_alpha() if pygame.display.get_surface() is not None else surface.copy()
+    if not out.get_flags() & pygame.SRCALPHA:
+        return out
+    rgb = pygame.surfarray.pixels3d(out)
+    alpha = pygame.surfarray.pixels_alpha(out)
+    rgb[...] = (rgb.astype(np.uint16) * alpha[..., None] // 255).astype(np.uint8)
+    del rgb, alpha # Release the pixel locks
+    return out
+
+class CachedScreen:
+    """
+    A static full-screen overlay (menu, shop, game over) composed once into a
+    single layer and re-rendered only when its key changes.
+
+    Layers are composited with premultiplied alpha: pygame's plain
+    alpha-onto-alpha blit is not a true "over" operator, and the cached
+    screen has to look the same as drawing each piece straight onto the
+    frame.
+    """
+    def __init__(self, name):
+        self.name = name
+        self.key = None
+        self.layer = None
+        self.offset = (0, 0)
+        self.result = None
+        self.renders = 0
+
+    def invalidate(self):
+        self.layer = None
+
+    def draw(self, surface, key, render):
+        """`render(target)` draws the screen; its return value is kept in `self.result`."""
+        if self.layer is None or key != self.key:
+            recorder = DisplayList(surface.get_size())
+            self.result = render(recorder)
+            layer = new_surface(surface.get_size(), pygame.SRCALPHA)
+            for op in recorder.ops:
+                layer.blit(premultiplied(op[0]), op[1], special_flags=pygame.BLEND_PREMULTIPLIED)
+            # Keep only the painted area so the per-frame blit (and dirty rect) stays small
+            bounds = layer.get_bounding_rect()
+            self.layer = layer.subsurface(bounds).copy()
+            self.offset = bounds.topleft
+            self.key = key
+            self.renders += 1
+        surface.blit(self.layer, self.offset, special_flags=pygame.BLEND_PREMULTIPLIED)
+        return self.result
@@ -1,14 +1,15 @@
 
 import random
-from enemy import Enemy
+from enemy import EnemyField, spawn_table, pick_type
 from boss import Boss
 
 class LevelManager:
-    def __init__(self, screen_width, screen_height):
+    def __init__(self, screen_width, screen_height, rng=None):
         self.screen_width = screen_width
         self.screen_height = screen_height
+        self.rng = rng or random.Random() # Gameplay stream: spawns and boss patterns
         self.level = 1
-        self.enemies = []
+        self.enemies = EnemyField()
         self.boss = None
         self.boss_active = False
         
@@ -19,6 +20,7 @@ class LevelManager:
         self.enemies_per_wave = 10
         self.enemies_spawned_in_level = 0
         self.enemies_to_spawn = 10
+        self.spawn_table = spawn_table(self.level)
         
         self.level_transition = False
         self.transition_timer = 0
@@ -27,6 +29,7 @@ class LevelManager:
         self.enemies_to_spawn = 10 + (self.level * 2)
         self.enemies_spawned_in_level = 0
         self.spawn_delay = max(20, 60 - (self.level * 2))
+        self.spawn_table = spawn_table(self.level) # Which enemy types this level rolls
         self.level_transition = False
 
     def update(self, player_rect, bullets):
@@ -42,19 +45,17 @@ class LevelManager:
             if not self.boss_active and self.enemies_spawned_in_level == 0: # Start boss immediately at level start?
                 # Actually let's just make the whole level the boss fight
                  if not self.boss:
-                     self.boss = Boss(self.screen_width, self.level)
+                     self.boss = Boss(self.screen_width, self.level, rng=self.rng)
                      self.boss_active = True
             
             if self.boss and self.boss.active:
-                boss_bullets = self.boss.update(player_rect)
-                for b in boss_bullets:
-                    bullets.append(b)
-                if not self.boss.active:
-                    # Boss defeated
-                    self.boss_active = False
-                    self.boss = None
-                    self.level_transition = True
-                    self.transition_timer = 0
+                self.boss.update(player_rect, bullets)
+            # Boss defeated (the killing hit lands in collision, after the last update)
+            if self.boss and not self.boss.active:
+                self.boss_active = False
+                self.boss = None
+                self.level_transition = True
+                self.transition_timer = 0
             return
 
         # Normal Level Spawning
@@ -68,31 +69,11 @@ class LevelManager:
             self.level_transition = True
             self.transition_timer = 0
 
-        # Update Enemies
-        for enemy in self.enemies:
-            # Note: We pass strict slow-mo status from main, but here we just coordinate
-            pass 
-            
-        # Cleanup dead enemies
-        self.enemies = [e for e in self.enemies if e.active]
+        # Cleanup dead enemies (the simulation moves them, after this update)
+        self.enemies.remove_inactive()
 
     def spawn_enemy(self):
-        x = random.randint(50, self.screen_width - 50)
+        x = self.rng.randint(50, self.screen_width - 50)
         # Determine enemy type based on level
-        r = random.random()
-        e_type = 'basic'
-        
-        if self.level > 2:
-            if r < 0.2: e_type = 'fast'
-        if self.level > 3:
-            if r < 0.4 and r > 0.2: e_type = 'sine'
-        if self.level > 4:
-            if r < 0.5 and r > 0.4: e_type = 'vanguard'
-        if self.level > 6:
-            if r < 0.6 and r > 0.5: e_type = 'tank'
-        if self.level > 8:
-            if r < 0.7 and r > 0.6: e_type = 'hunter'
-            
-        enemy = Enemy(x, -50, enemy_type=e_type)
-        self.enemies.append(enemy)
+        self.enemies.add(x, -50, pick_type(self.spawn_table, self.rng.random()))
         self.enemies_spawned_in_level += 1
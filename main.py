@@ -1,79 +1,178 @@
+import time
+BOOT_START = time.perf_counter() # Before the heavy imports, for the time-to-first-frame report
 
 import pygame
 import sys
+import os
 import random
 import asyncio
+import argparse
 
-from player import Player
-from bullet import Bullet
-from level import LevelManager
 from ui import UI
-from effects import Starfield, Explosion, ScreenShake, Nebula, FloatingText
-from powerup import PowerUp
+from hud import HUD, CachedScreen
+from renderer import DirtyRenderer
+from render_targets import RenderTargets
+from sprite_cache import sprites
+from atlas import ATLAS_IMAGE, ATLAS_INDEX
+from profiler import profiler, ProfilerOverlay, BootTimer
+from effects import Starfield, ScreenShake, Nebula, BACKGROUND_COLOR
 from sound_manager import SoundManager
-from save_manager import SaveManager
+from save_manager import open_save
+from simulation import Simulation, no_input, autopilot, TICK_RATE
+from replay import InputRecorder, InputReplay, numbered_path
 
 # Constants
 SCREEN_WIDTH = 600
 SCREEN_HEIGHT = 800
-FPS = 60
+FPS = 60 # Render cap; the simulation always advances at TICK_RATE
+TICK_MS = 1000 / TICK_RATE
+MAX_TICKS_PER_FRAME = 5 # Below TICK_RATE / 5 fps the game slows down rather than stalling to catch up
 
-# Initialize Pygame
-pygame.init()
-pygame.display.set_caption("Space Shooter Glass")
-screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-clock = pygame.time.Clock()
+def reset_game(save_manager, sound_manager=None, screen_shake=None, seed=None, upgrades=None):
+    sim = Simulation(SCREEN_WIDTH, SCREEN_HEIGHT, upgrades=upgrades or save_manager.data['upgrades'],
+                     sound_manager=sound_manager, screen_shake=screen_shake, seed=seed)
+    return sim
 
-def reset_game(save_manager):
-    player = Player(SCREEN_WIDTH, SCREEN_HEIGHT, upgrades=save_manager.data['upgrades'])
-    level_manager = LevelManager(SCREEN_WIDTH, SCREEN_HEIGHT)
-    return player, level_manager
+def save_recording(recorder, path, run, sim):
+    path = numbered_path(path, run)
+    recorder.save(path, sim.fingerprint())
+    print(f"Recorded {recorder.frames} frames (seed {recorder.seed}) to {path}")
 
-async def main():
-    save_manager = SaveManager()
+def report_replay(replay, sim):
+    mismatched = replay.check(sim.fingerprint())
+    if mismatched:
+        print(f"Replay of {replay.path} diverged at the end of the run: {', '.join(mismatched)} differ")
+    else:
+        print(f"Replay of {replay.path} matched the recording ({replay.position} frames)")
+    return not mismatched
+
+def run_headless(seed=0, frames=10000, profile_out=None):
+    """
+    Runs the game rules with an autopilot and no window, drawing or frame cap.
+    A new run is started whenever the pilot dies, until `frames` have been simulated.
+    With `profile_out` the per-phase timings of every frame are written there.
+    """
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    seeds = random.Random(seed) # Each run after a death gets the next seed from this stream
+    upgrades = {'speed': 0, 'fire_rate': 0, 'health': 0, 'magnet': 0}
+    sim = Simulation(SCREEN_WIDTH, SCREEN_HEIGHT, upgrades=upgrades, visuals=False, seed=seeds.randrange(2**32))
+    sim.start()
+    runs = 1
+
+    if profile_out: profiler.record(profile_out)
+    start = time.perf_counter()
+    for _ in range(frames):
+        profiler.begin_frame()
+        sim.update(autopilot(sim))
+        profiler.count(sim.entity_counts())
+        profiler.end_frame()
+        if sim.game_over:
+            sim = Simulation(SCREEN_WIDTH, SCREEN_HEIGHT, upgrades=upgrades, visuals=False, seed=seeds.randrange(2**32))
+            sim.start()
+            runs += 1
+    elapsed = time.perf_counter() - start
+    profiler.close()
+
+    fps = frames / elapsed if elapsed > 0 else float('inf')
+    print(f"Simulated {frames} frames over {runs} run(s) in {elapsed:.3f}s: {fps:.0f} frames/s (seed {seed})")
+    return fps
+
+def run_replay(path):
+    """Plays a recording back without a window and checks it ends in the recorded state."""
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    replay = InputReplay(path)
+    sim = Simulation(SCREEN_WIDTH, SCREEN_HEIGHT, upgrades=replay.upgrades, visuals=False, seed=replay.seed)
+    sim.start()
+    while not replay.done and not sim.game_over:
+        sim.update(replay.next())
+    return report_replay(replay, sim)
+
+def draw_backdrop(surface, nebula=None):
+    surface.fill(BACKGROUND_COLOR)
+    if nebula: nebula.draw(surface)
+
+def draw_menu(ui, surface, save_manager):
+    ui.draw_glass_panel(surface, pygame.Rect(100, 150, 400, 500))
+    ui.draw_text(surface, "SPACE SHOOTER", SCREEN_WIDTH//2, 200, center=True, font_type='title')
+    ui.draw_text(surface, "Press SPACE to Start", SCREEN_WIDTH//2, 300, center=True, font_type='large')
+    ui.draw_text(surface, "Press 'S' for Hanger (Shop)", SCREEN_WIDTH//2, 360, center=True, font_type='small', color=(0, 255, 255))
+    ui.draw_leaderboard(surface, save_manager.data['leaderboard'])
+
+async def main(nebula_resolution=1.0, dirty_rects=False, star_density=1.0, profile=False, profile_out=None,
+               record=None, replay=None, fps=FPS, save_db=None, pilot='PLAYER'):
+    boot = BootTimer(BOOT_START)
+    boot.mark('imports')
+    # Only what the first frame needs; the mixer is opened by SoundManager in the background
+    pygame.display.init()
+    pygame.font.init()
+    pygame.display.set_caption("Space Shooter Glass")
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    clock = pygame.time.Clock()
+    boot.mark('display')
+    sprites.load_atlas(ATLAS_IMAGE, ATLAS_INDEX) # Needs the display for convert_alpha
+    boot.mark('atlas')
+
+    save_manager = open_save(save_db, pilot)
+    boot.mark('save')
     running = True
     game_state = "MENU" # MENU, PLAYING, GAMEOVER, SHOP
     
     # Game Objects
-    player, level_manager = reset_game(save_manager)
     ui = UI()
-    starfield = Starfield(SCREEN_WIDTH, SCREEN_HEIGHT)
-    nebula = Nebula(SCREEN_WIDTH, SCREEN_HEIGHT)
+    hud = HUD(ui)
+    menu_screen = CachedScreen('menu')
+    shop_screen = CachedScreen('shop')
+    game_over_screen = CachedScreen('game_over')
+    dirty_renderer = DirtyRenderer(screen) if dirty_rects else None
+    targets = RenderTargets(screen)
+    overlay = ProfilerOverlay(profiler)
+    if profile_out: profiler.record(profile_out)
+    if profile: overlay.toggle()
+    starfield = Starfield(SCREEN_WIDTH, SCREEN_HEIGHT, density=star_density)
+    nebula = Nebula(SCREEN_WIDTH, SCREEN_HEIGHT, resolution=nebula_resolution)
     screen_shake = ScreenShake()
+    boot.mark('ui_backdrop')
     sound_manager = SoundManager()
     sound_manager.play_music()
-    
-    # Game Lists
-    bullets = []
-    enemy_bullets = []
-    powerups = []
-    explosions = []
-    floating_texts = []
+    sim = reset_game(save_manager, sound_manager, screen_shake)
+    boot.mark('game')
+
+    # Recording / replay: with `record` every run is written out; `replay` starts straight into a recorded run
+    recorder = None
+    recorded_runs = 0
+    replay_run = None
+    if replay:
+        replay_run = InputReplay(replay)
+        sim = reset_game(save_manager, sound_manager, screen_shake, seed=replay_run.seed, upgrades=replay_run.upgrades)
+        sim.start()
+        game_state = "PLAYING"
     
     # Game State
-    combo = 1
-    combo_timer = 0
-    flash_alpha = 0
     shop_buttons = {}
-    
-    # Sound & Transition State
-    last_level = 1
-    boss_was_active = False
-    level_text_timer = 0
     game_over_sound_played = False
-    low_health_sound_timer = 0
     
     # Touch input state
     touch_active = {'left': False, 'right': False, 'shoot': False}
     touch_rects = {}
+
+    # Fixed-step loop: rendering runs as fast as the device allows (up to `fps`) and the
+    # simulation catches up in whole ticks; `alpha` is how far the frame is into the next tick
+    pending = no_input() # Presses seen since the last tick, delivered to the next one
+    accumulator = 0.0
+    last_time = time.perf_counter()
+    shake_x, shake_y = 0, 0
     
     while running:
+        profiler.begin_frame()
+
         # 1. Event Handling
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 running = False
             
             if event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_F3:
+                    overlay.toggle()
                 if event.key == pygame.K_ESCAPE:
                     if game_state == "SHOP":
                         game_state = "MENU"
@@ -81,36 +180,28 @@ async def main():
                         running = False
                 if game_state == "MENU":
                     if event.key == pygame.K_SPACE:
-                        player, level_manager = reset_game(save_manager)
+                        sim = reset_game(save_manager, sound_manager, screen_shake)
                         game_state = "PLAYING"
                         sound_manager.play('shoot')
-                        level_manager.start_level()
-                        last_level = level_manager.level
+                        sim.start()
                         game_over_sound_played = False
-                        level_text_timer = 90
+                        if record: recorder = InputRecorder(sim.seed, save_manager.data['upgrades'])
                     if event.key == pygame.K_s:
                         game_state = "SHOP"
                 elif game_state == "GAMEOVER":
                     if event.key == pygame.K_r:
-                        player, level_manager = reset_game(save_manager)
-                        bullets, enemy_bullets, powerups, explosions = [], [], [], []
+                        sim = reset_game(save_manager, sound_manager, screen_shake)
                         game_state = "PLAYING"
-                        level_manager.start_level()
-                        last_level = level_manager.level
+                        sim.start()
                         game_over_sound_played = False
-                        level_text_timer = 90
+                        if record: recorder = InputRecorder(sim.seed, save_manager.data['upgrades'])
                     if event.key == pygame.K_m:
                         game_state = "MENU"
                 elif game_state == "PLAYING":
                     if event.key == pygame.K_SPACE:
-                        new_bullets = player.shoot(pygame.time.get_ticks())
-                        if new_bullets:
-                            bullets.extend(new_bullets)
-                            sound_manager.play('shoot')
+                        pending['shoot'] = True
                     if event.key == pygame.K_LSHIFT or event.key == pygame.K_RSHIFT:
-                        if player.activate_secondary():
-                            sound_manager.play('boss_enter') # Reuse for deep rumble
-                            screen_shake.start(20, 10)
+                        pending['emp'] = True
             
             if event.type == pygame.MOUSEBUTTONDOWN:
                 m_pos = pygame.mouse.get_pos()
@@ -120,14 +211,9 @@ async def main():
                         if touch_rects['right'].collidepoint(m_pos): touch_active['right'] = True
                         if touch_rects['shoot'].collidepoint(m_pos): 
                             touch_active['shoot'] = True
-                            new_bullets = player.shoot(pygame.time.get_ticks())
-                            if new_bullets:
-                                bullets.extend(new_bullets)
-                                sound_manager.play('shoot')
+                            pending['shoot'] = True
                         if 'emp' in touch_rects and touch_rects['emp'].collidepoint(m_pos):
-                            if player.activate_secondary():
-                                sound_manager.play('boss_enter')
-                                screen_shake.start(20, 10)
+                            pending['emp'] = True
                 elif game_state == "SHOP":
                     for key, (rect, cost) in shop_buttons.items():
                         if rect.collidepoint(m_pos):
@@ -139,191 +225,198 @@ async def main():
                 touch_active['right'] = False
                 touch_active['shoot'] = False
 
+        profiler.lap('events')
+
         # 2. Update
-        starfield.update()
-        nebula.update()
-        shake_x, shake_y = screen_shake.update()
-        if flash_alpha > 0: flash_alpha -= 10
-        
-        if game_state == "PLAYING":
-            keys = pygame.key.get_pressed()
-            if touch_active['left']: player.x -= player.speed
-            if touch_active['right']: player.x += player.speed
-            
-            player.update(keys)
-            level_manager.update(player.rect, enemy_bullets)
-            
-            # Combo Logic
-            if combo_timer > 0:
-                combo_timer -= 1
-            else:
-                combo = 1
-            
-            # Level / Boss Detect
-            if level_manager.level > last_level:
-                sound_manager.play('level_complete')
-                level_text_timer = 90 # 1.5 seconds
-                last_level = level_manager.level
-            
-            if level_manager.boss_active and not boss_was_active:
-                sound_manager.play('boss_enter')
-                boss_was_active = True
-            elif not level_manager.boss_active:
-                boss_was_active = False
+        now = time.perf_counter()
+        accumulator = min(accumulator + (now - last_time) * 1000, TICK_MS * MAX_TICKS_PER_FRAME)
+        last_time = now
+        ticks = 0
+        while accumulator >= TICK_MS:
+            accumulator -= TICK_MS
+            ticks += 1
+            starfield.update()
+            nebula.update()
+            shake_x, shake_y = screen_shake.update()
+            profiler.lap('background.update')
 
-            if level_text_timer > 0: level_text_timer -= 1
+            if game_state == "PLAYING" and replay_run and replay_run.done:
+                # Recording ended without a game over (the player quit mid-run)
+                report_replay(replay_run, sim)
+                replay_run = None
+                game_state = "MENU"
 
-            for b in bullets: b.update()
-            for eb in enemy_bullets: eb.update()
-            
-            # Magnet Upgrade Logic
-            magnet_range = 100 + player.upgrades['magnet'] * 50
-            for p in powerups: 
-                p.update()
-                if player.upgrades['magnet'] > 0:
-                    dist = pygame.math.Vector2(player.rect.center).distance_to(p.rect.center)
-                    if dist < magnet_range:
-                        p.x += (player.rect.centerx - p.rect.centerx) * 0.05
-                        p.y += (player.rect.centery - p.rect.centery) * 0.05
-
-            for e in level_manager.enemies:
-                new_eb = e.update(slow_active=player.slow_motion_active, player_rect=player.rect)
-                if new_eb: enemy_bullets.extend(new_eb)
+            if game_state == "PLAYING":
+                if replay_run:
+                    actions = replay_run.next()
+                else:
+                    actions = pending
+                    keys = pygame.key.get_pressed()
+                    actions['left'] = keys[pygame.K_LEFT] or keys[pygame.K_a] or touch_active['left']
+                    actions['right'] = keys[pygame.K_RIGHT] or keys[pygame.K_d] or touch_active['right']
+                pending = no_input()
+                if recorder: recorder.record(actions)
                 
-                # EMP vs Enemies
-                if player.emp_active:
-                    dist = pygame.math.Vector2(player.rect.center).distance_to(e.rect.center)
-                    if dist < player.emp_radius:
-                        e.active = False
-                        player.score += 10 * combo
-                        floating_texts.append(FloatingText(e.rect.x, e.rect.y, f"+{10*combo}", (0, 255, 255)))
-                        explosions.append(Explosion(e.rect.centerx, e.rect.centery))
-
-                if e.rect.colliderect(player.rect):
-                    if not player.shield_active:
-                        player.take_damage(20)
-                        flash_alpha = 150
-                        screen_shake.start(15, 8)
-                        sound_manager.play('damage')
-                        explosions.append(Explosion(e.rect.centerx, e.rect.centery))
-                        e.active = False
+                sim.update(actions)
+
+                if sim.game_over:
+                    game_state = "GAMEOVER"
+                    if not game_over_sound_played:
+                        sound_manager.play('game_over')
+                        game_over_sound_played = True
+                    if replay_run:
+                        report_replay(replay_run, sim) # Replays don't earn credits or leaderboard spots
+                        replay_run = None
                     else:
-                         e.active = False
-                         explosions.append(Explosion(e.rect.centerx, e.rect.centery))
-                         sound_manager.play('explosion')
-                         player.score += 10
-
-            for b in bullets[:]:
-                if not b.active: continue
-                for e in level_manager.enemies:
-                    if e.active and b.rect.colliderect(e.rect):
-                        b.active = False
-                        if e.take_damage(10):
-                            explosions.append(Explosion(e.rect.centerx, e.rect.centery))
-                            sound_manager.play('explosion')
-                            player.score += 10 * combo
-                            floating_texts.append(FloatingText(e.rect.x, e.rect.y, f"+{10*combo}"))
-                            combo += 1
-                            combo_timer = 120 # 2 seconds
-                            if random.random() < 0.1: powerups.append(PowerUp(e.rect.centerx, e.rect.centery))
-                        break
-                
-                if level_manager.boss_active and level_manager.boss:
-                     if b.rect.colliderect(level_manager.boss.rect):
-                         b.active = False
-                         if level_manager.boss.take_damage(5):
-                             explosions.append(Explosion(level_manager.boss.rect.centerx, level_manager.boss.rect.centery, color=(200, 50, 200)))
-                             sound_manager.play('explosion')
-                             player.score += 500
-                             screen_shake.start(30, 10)
-            
-            for eb in enemy_bullets[:]:
-                if eb.active and eb.rect.colliderect(player.rect):
-                    eb.active = False
-                    if not player.shield_active:
-                        player.take_damage(10)
-                        sound_manager.play('damage')
-                        flash_alpha = 100
-                        screen_shake.start(5, 3)
-            
-            for p in powerups[:]:
-                if p.active and p.rect.colliderect(player.rect):
-                    p.active = False
-                    player.activate_powerup(p.type)
-                    sound_manager.play('powerup')
-
-            bullets = [b for b in bullets if b.active]
-            enemy_bullets = [b for b in enemy_bullets if b.active]
-            powerups = [p for p in powerups if p.active]
-            explosions = [ex for ex in explosions if ex.update()]
-            floating_texts = [ft for ft in floating_texts if ft.update()]
-
-            if player.health <= player.max_health * 0.3:
-                low_health_sound_timer -= 1
-                if low_health_sound_timer <= 0:
-                    sound_manager.play('low_health')
-                    low_health_sound_timer = 30 # 0.5s
-
-            if player.health <= 0:
-                game_state = "GAMEOVER"
-                if not game_over_sound_played:
-                    sound_manager.play('game_over')
-                    game_over_sound_played = True
-                save_manager.add_credits(player.score // 10)
-                save_manager.add_score("PLAYER", player.score)
+                        save_manager.add_credits(sim.player.score // 10)
+                        save_manager.add_score(save_manager.profile, sim.player.score)
+                    if recorder:
+                        recorded_runs += 1
+                        save_recording(recorder, record, recorded_runs, sim)
+                        recorder = None
+            else:
+                pending = no_input()
+                if sim.game_over:
+                    sim.update(no_input()) # Rules are frozen; only the damage flash keeps fading
+        alpha = accumulator / TICK_MS
+        sound_manager.update() # One mixer pass per frame, however many ticks queued sounds
+        profiler.lap('sound')
+        profiler.count(sim.entity_counts())
+        profiler.count({'ticks': ticks})
+        profiler.count({'sfx_merged': sound_manager.counters['merged'],
+                        'sfx_dropped': sound_manager.counters['dropped_cooldown'] + sound_manager.counters['dropped_voices']})
 
         # 3. Draw
-        display_surf = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
-        starfield.draw(display_surf)
-        
-        if game_state in ["PLAYING", "GAMEOVER"]:
-            nebula.draw(display_surf)
-            for p in powerups: p.draw(display_surf)
-            for b in bullets: b.draw(display_surf)
-            for eb in enemy_bullets: eb.draw(display_surf)
-            for e in level_manager.enemies: e.draw(display_surf)
-            if level_manager.boss: level_manager.boss.draw(display_surf)
-            player.draw(display_surf)
-            for ex in explosions: ex.draw(display_surf)
-            for ft in floating_texts: ft.draw(display_surf, ui.font_small)
-            
-            screen.blit(display_surf, (shake_x, shake_y))
-            ui.draw_hud(screen, player, level_manager, credits=save_manager.data['credits'])
-            ui.draw_combo(screen, combo)
-            ui.draw_boss_health(screen, level_manager.boss)
+        targets.begin_frame()
+        glitch = (game_state == "PLAYING" and sim.player.health <= sim.player.max_health * 0.3
+                  and random.random() < 0.1)
+        tracked = (dirty_renderer is not None and game_state != "GAMEOVER" and not glitch
+                   and (shake_x, shake_y) == (0, 0) and sim.flash_alpha <= 0 and not overlay.visible)
+
+        if tracked:
+            if game_state == "PLAYING":
+                dirty_renderer.set_backdrop('world', lambda s: draw_backdrop(s, nebula))
+            else:
+                dirty_renderer.set_backdrop('menu', lambda s: draw_backdrop(s))
+            tracker = dirty_renderer.begin()
+            tracker.mark(starfield.draw_stars(screen, alpha))
+            profiler.lap('draw.background')
+
             if game_state == "PLAYING":
-                 touch_rects = ui.draw_touch_controls(screen)
-                 if level_text_timer > 0:
-                     ui.draw_level_overlay(screen, level_manager.level)
-                 
-                 # Low Health Glitch
-                 if player.health <= player.max_health * 0.3:
-                     # Very slight offset of surface to simulate glitch
-                     if random.random() < 0.1:
+                sim.draw(tracker, alpha)
+                hud.draw(tracker, sim.player, sim.level_manager, credits=save_manager.data['credits'], combo=sim.combo)
+                touch_rects = hud.draw_touch_controls(tracker)
+                if sim.level_text_timer > 0:
+                    hud.draw_level_banner(tracker, sim.level_manager.level)
+            elif game_state == "MENU":
+                menu_screen.draw(tracker, save_manager.revision, lambda target: draw_menu(ui, target, save_manager))
+            elif game_state == "SHOP":
+                shop_buttons = shop_screen.draw(tracker, save_manager.revision,
+                                                lambda target: ui.draw_shop(target, save_manager.data['credits'], save_manager.data['upgrades']))
+            profiler.lap('draw.hud')
+            dirty_renderer.end(tracker)
+            profiler.lap('flip')
+        else:
+            # Background, world and effects share the persistent world target; the HUD goes on the screen
+            world = targets.get('world')
+            starfield.draw(world, alpha)
+            profiler.lap('draw.background')
+            
+            if game_state in ["PLAYING", "GAMEOVER"]:
+                nebula.draw(world)
+                profiler.lap('draw.background')
+                sim.draw(world, alpha)
+                
+                player = sim.player
+                targets.present('world', (shake_x, shake_y))
+                profiler.lap('draw.present_world')
+                hud.draw(screen, player, sim.level_manager, credits=save_manager.data['credits'], combo=sim.combo)
+                if game_state == "PLAYING":
+                     touch_rects = hud.draw_touch_controls(screen)
+                     if sim.level_text_timer > 0:
+                         hud.draw_level_banner(screen, sim.level_manager.level)
+                     
+                     # Low Health Glitch
+                     if glitch:
+                         # Very slight offset of surface to simulate glitch
                          screen.blit(screen, (random.randint(-5, 5), random.randint(-5, 5)), special_flags=pygame.BLEND_ADD)
 
-            if flash_alpha > 0: ui.draw_screen_flash(screen, (255, 50, 50), flash_alpha)
-            if game_state == "GAMEOVER":
-                ui.draw_game_over(screen, player.score)
+                if sim.flash_alpha > 0: ui.draw_screen_flash(screen, (255, 50, 50), sim.flash_alpha)
+                if game_state == "GAMEOVER":
+                    game_over_screen.draw(screen, player.score, lambda target: ui.draw_game_over(target, player.score))
+                    
+            elif game_state == "MENU":
+                targets.present('world')
+                menu_screen.draw(screen, save_manager.revision, lambda target: draw_menu(ui, target, save_manager))
+
+            elif game_state == "SHOP":
+                targets.present('world')
+                shop_buttons = shop_screen.draw(screen, save_manager.revision,
+                                                lambda target: ui.draw_shop(target, save_manager.data['credits'], save_manager.data['upgrades']))
                 
-        elif game_state == "MENU":
-            screen.blit(display_surf, (0, 0))
-            ui.draw_glass_panel(screen, pygame.Rect(100, 150, 400, 500))
-            ui.draw_text(screen, "SPACE SHOOTER", SCREEN_WIDTH//2, 200, center=True, font_type='title')
-            ui.draw_text(screen, "Press SPACE to Start", SCREEN_WIDTH//2, 300, center=True, font_type='large')
-            ui.draw_text(screen, "Press 'S' for Hanger (Shop)", SCREEN_WIDTH//2, 360, center=True, font_type='small', color=(0, 255, 255))
-            ui.draw_leaderboard(screen, save_manager.data['leaderboard'])
-
-        elif game_state == "SHOP":
-            screen.blit(display_surf, (0, 0))
-            shop_buttons = ui.draw_shop(screen, save_manager.data['credits'], save_manager.data['upgrades'])
-            
-        pygame.display.flip()
-        clock.tick(FPS)
+            profiler.lap('draw.hud')
+            overlay.draw(screen)
+            profiler.lap('draw.overlay')
+            if dirty_renderer:
+                dirty_renderer.full_frame()
+            else:
+                pygame.display.flip()
+            profiler.lap('flip')
+        targets.end_frame()
+        if boot.total is None:
+            boot.first_frame()
+            if profile: print(boot.summary())
+        profiler.count({'allocations': targets.frame_allocations})
+        clock.tick(fps)
+        profiler.lap('idle')
+        profiler.end_frame()
         await asyncio.sleep(0) # Required for web
 
+    # Reported whenever --dirty-rects is on, not behind --profile: the overlay that
+    # --profile opens is drawn over everything, so those frames are all full flips
+    if dirty_renderer:
+        stats = dirty_renderer.stats()
+        print(f"Dirty-rect renderer: {stats['mean_percent']:.1f}% of the screen updated per frame on average, "
+              f"{stats['full_frames']} of {stats['frames']} frames fell back to a full flip")
+
+    if recorder:
+        recorded_runs += 1
+        save_recording(recorder, record, recorded_runs, sim)
+    profiler.close()
+    save_manager.close() # Waits for queued progress to reach the disk
+    if profile:
+        counters = sound_manager.counters
+        print(f"Sound: {counters['played']} played, {counters['merged']} merged, "
+              f"{counters['dropped_cooldown']} dropped by cooldown, {counters['dropped_voices']} for lack of voices")
+        stats = targets.stats()
+        print(f"Render targets: {stats['allocating_frames']} of {stats['frames']} frames allocated surfaces "
+              f"(peak {stats['peak']} in one frame)")
+
     pygame.quit()
     sys.exit()
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    parser = argparse.ArgumentParser(description="Space Shooter Glass")
+    parser.add_argument("--headless", action="store_true", help="run the simulation without a window and report frames/s")
+    parser.add_argument("--seed", type=int, default=0, help="random seed for headless runs")
+    parser.add_argument("--frames", type=int, default=10000, help="number of frames to simulate headless")
+    parser.add_argument("--dirty-rects", action="store_true", help="only update changed screen regions (low-power devices)")
+    parser.add_argument("--star-density", type=float, default=1.0, help="multiply the number of background stars (e.g. 50 for a dense desktop starfield)")
+    parser.add_argument("--profile", action="store_true", help="start with the F3 frame profiler overlay open, print the boot timing, and print sound and render-target stats on exit")
+    parser.add_argument("--profile-out", help="write per-frame phase timings and entity counts to this .csv or .jsonl file")
+    parser.add_argument("--record", metavar="PATH", help="record each run's seed and inputs (PATH, PATH-2, ...) for replay")
+    parser.add_argument("--replay", metavar="PATH", help="play back a recorded run (with --headless: verify it without a window)")
+    parser.add_argument("--fps", type=int, default=FPS, help=f"render frame cap, 0 for uncapped; the game itself always runs at {TICK_RATE} ticks/s")
+    parser.add_argument("--save-db", metavar="PATH", help="keep profiles and the full score history in this SQLite database (imports save_data.json once)")
+    parser.add_argument("--pilot", default="PLAYER", help="profile name that earns credits/upgrades and leaderboard entries")
+    parser.add_argument("--nebula-resolution", type=float, default=1.0, help="render the nebula at this fraction of screen resolution (e.g. 0.5 on weak devices)")
+    args, _ = parser.parse_known_args()
+
+    if args.headless and args.replay:
+        sys.exit(0 if run_replay(args.replay) else 1)
+    elif args.headless:
+        run_headless(args.seed, args.frames, profile_out=args.profile_out)
+    else:
+        asyncio.run(main(nebula_resolution=args.nebula_resolution, dirty_rects=args.dirty_rects,
+                         star_density=args.star_density, profile=args.profile, profile_out=args.profile_out,
+                         record=args.record, replay=args.replay, fps=args.fps, save_db=args.save_db, pilot=args.pilot))
@@ -1,16 +1,18 @@
 
 import pygame
-from bullet import Bullet
 from effects import Trail
+from sprite_cache import sprites
+from render_targets import new_surface
 
 class Player:
-    def __init__(self, screen_width, screen_height, upgrades=None):
+    def __init__(self, screen_width, screen_height, upgrades=None, particles=None):
         self.screen_width = screen_width
         self.screen_height = screen_height
         self.width = 50
         self.height = 40
         self.x = screen_width // 2
         self.y = screen_height - 100
+        self.prev_x = self.x
         
         # Upgrades (Defaults)
         self.upgrades = upgrades or {'speed': 0, 'fire_rate': 0, 'health': 0, 'magnet': 0}
@@ -26,7 +28,7 @@ class Player:
         # Visuals
         self.tilt_angle = 0
         self.max_tilt = 15
-        self.trail = Trail()
+        self.trail = Trail(particles) if particles is not None else None
         
         # Attack state
         self.last_shot_time = 0
@@ -46,13 +48,14 @@ class Player:
         self.emp_radius = 0
         self.emp_max_radius = 300
 
-    def update(self, keys):
-        # Movement & Tilting
+    def update(self, move=0, dt=1000/60):
+        # Movement & Tilting (move: -1 left, 0 idle, 1 right)
+        self.prev_x = self.x
         target_tilt = 0
-        if keys[pygame.K_LEFT] or keys[pygame.K_a]:
+        if move < 0:
             self.x -= self.speed
             target_tilt = self.max_tilt
-        if keys[pygame.K_RIGHT] or keys[pygame.K_d]:
+        elif move > 0:
             self.x += self.speed
             target_tilt = -self.max_tilt
             
@@ -65,11 +68,10 @@ class Player:
         self.rect.y = int(self.y)
         
         # Exhaust
-        self.trail.add(self.rect.centerx, self.rect.bottom - 5)
-        self.trail.update()
+        if self.trail:
+            self.trail.add(self.rect.centerx, self.rect.bottom - 5)
         
-        # Powerup timers
-        dt = 16 # Approx for 60fps
+        # Powerup timers (dt: ms per simulation tick)
         if self.double_bullet_active:
             self.double_bullet_timer -= dt
             if self.double_bullet_timer <= 0:
@@ -94,17 +96,17 @@ class Player:
                 self.emp_active = False
                 self.emp_radius = 0
 
-    def shoot(self, current_time):
+    def shoot(self, current_time, bullets):
+        """Emits into the `bullets` field; returns True if the gun fired."""
         if current_time - self.last_shot_time > self.shoot_delay:
             self.last_shot_time = current_time
-            bullets = []
             if self.double_bullet_active:
-                bullets.append(Bullet(self.rect.centerx - 10, self.rect.top))
-                bullets.append(Bullet(self.rect.centerx + 10, self.rect.top))
+                bullets.emit(self.rect.centerx - 10, self.rect.top)
+                bullets.emit(self.rect.centerx + 10, self.rect.top)
             else:
-                bullets.append(Bullet(self.rect.centerx, self.rect.top))
-            return bullets
-        return []
+                bullets.emit(self.rect.centerx, self.rect.top)
+            return True
+        return False
 
     def take_damage(self, amount):
         if self.shield_active:
@@ -135,37 +137,57 @@ class Player:
             return True
         return False
 
-    def draw(self, surface):
-        self.trail.draw(surface)
+    def draw(self, surface, alpha=1.0):
+        # Drawn between the previous and current tick's position; y never changes
+        cx = int(self.x - (self.x - self.prev_x) * (1 - alpha)) + self.width // 2
+        cy = self.rect.centery
+
+        # Ship tilt is quantized to whole degrees so rotations can be cached
+        ship, (ox, oy) = sprites.get('player', 'ship', (0, 200, 255), (self.width, self.height), round(self.tilt_angle))
+        surface.blit(ship, (cx + ox, cy + oy))
         
+        # Shield Visualization
+        if self.shield_active:
+            shield, (ox, oy) = sprites.get('player', 'shield', (100, 255, 100), (self.width + 20, self.height + 20))
+            surface.blit(shield, (cx + ox, cy + oy))
+
+        # EMP Nova Drawing
+        if self.emp_active and self.emp_radius > 0:
+            fade = max(0, 150 - (self.emp_radius / self.emp_max_radius) * 150)
+            emp, (ox, oy) = sprites.get('player', 'emp', (0, 255, 255, int(fade)), self.emp_radius)
+            surface.blit(emp, (cx + ox, cy + oy))
+
+def bake_player(part, color, size, angle):
+    """Player visuals anchored on the ship's center."""
+    if part == 'ship':
         # Draw Ship - Triangle shape with rotation/tilting
-        ship_surf = pygame.Surface((self.width, self.height), pygame.SRCALPHA)
+        width, height = size
+        ship_surf = new_surface(size, pygame.SRCALPHA)
         points = [
-            (self.width // 2, 0),
-            (0, self.height),
-            (self.width // 2, self.height - 10),
-            (self.width, self.height)
+            (width // 2, 0),
+            (0, height),
+            (width // 2, height - 10),
+            (width, height)
         ]
-        pygame.draw.polygon(ship_surf, (0, 200, 255), points)
+        pygame.draw.polygon(ship_surf, color, points)
         
         # Engine Glow
-        pygame.draw.circle(ship_surf, (0, 255, 255, 100), (self.width // 2, self.height - 5), 5)
+        pygame.draw.circle(ship_surf, (0, 255, 255, 100), (width // 2, height - 5), 5)
         
         # Rotate based on tilt
-        rotated_ship = pygame.transform.rotate(ship_surf, self.tilt_angle)
-        rot_rect = rotated_ship.get_rect(center=self.rect.center)
-        surface.blit(rotated_ship, rot_rect.topleft)
-        
-        # Shield Visualization
-        if self.shield_active:
-            shield_surf = pygame.Surface((self.width + 20, self.height + 20), pygame.SRCALPHA)
-            pygame.draw.ellipse(shield_surf, (100, 255, 100, 100), shield_surf.get_rect(), width=2)
-            pygame.draw.ellipse(shield_surf, (100, 255, 100, 30), shield_surf.get_rect())
-            surface.blit(shield_surf, (self.rect.centerx - self.width//2 - 10, self.rect.centery - self.height//2 - 10))
+        surf = pygame.transform.rotate(ship_surf, angle)
+        return surf, (-(surf.get_width() // 2), -(surf.get_height() // 2))
 
-        # EMP Nova Drawing
-        if self.emp_active:
-            emp_surf = pygame.Surface((self.emp_radius*2, self.emp_radius*2), pygame.SRCALPHA)
-            alpha = max(0, 150 - (self.emp_radius / self.emp_max_radius) * 150)
-            pygame.draw.circle(emp_surf, (0, 255, 255, alpha), (self.emp_radius, self.emp_radius), self.emp_radius, 2)
-            surface.blit(emp_surf, (self.rect.centerx - self.emp_radius, self.rect.centery - self.emp_radius))
+    if part == 'shield':
+        surf = new_surface(size, pygame.SRCALPHA)
+        pygame.draw.ellipse(surf, (*color, 100), surf.get_rect(), width=2)
+        pygame.draw.ellipse(surf, (*color, 30), surf.get_rect())
+        return surf, (-(size[0] // 2), -(size[1] // 2))
+
+    if part == 'emp':
+        radius = size
+        surf = new_surface((radius*2, radius*2), pygame.SRCALPHA)
+        pygame.draw.circle(surf, color, (radius, radius), radius, 2)
+        return surf, (-radius, -radius)
+
+sprites.register('player', bake_player)
@@ -1,55 +1,102 @@
 
 import pygame
 import random
+import numpy as np
+from entities import Archetype, DIRECT_MAX_ROWS
+from sprite_cache import sprites
+from render_targets import new_surface
+from text_cache import text_cache
 
-class PowerUp:
-    TYPES = ['double', 'shield', 'slow', 'health']
-    
-    def __init__(self, x, y):
-        self.x = x
-        self.y = y
+# type -> (color, label)
+POWERUP_LOOKS = {
+    'double': ((255, 100, 255), "2X"), # Pink/Purple
+    'shield': ((100, 255, 100), "SD"), # Green
+    'slow': ((100, 200, 255), "SL"),   # Blue
+    'health': ((255, 50, 50), "H+"),   # Red
+}
+TYPE_NAMES = list(POWERUP_LOOKS)
+TYPE_IDS = {name: i for i, name in enumerate(TYPE_NAMES)}
+SIZE = 20
+SPEED = 2
+
+class PowerUpField(Archetype):
+    """Dropped powerups, falling as one batch until collected or off screen."""
+    def __init__(self, capacity=16):
+        super().__init__({
+            'x': np.float64, 'y': np.float64, 'px': np.float64, 'py': np.float64,
+            'type': np.int8, 'active': np.bool_,
+        }, capacity)
+
+    def add(self, x, y, rng=None):
         # Adjust probabilities: Health should be slightly rarer or common depending on feel
-        self.type = random.choice(self.TYPES)
-        self.width = 20
-        self.height = 20
-        self.rect = pygame.Rect(x, y, self.width, self.height)
-        self.speed = 2
-        self.active = True
-        
-        # Colors per type
-        if self.type == 'double':
-            self.color = (255, 100, 255) # Pink/Purple
-            self.label = "2X"
-        elif self.type == 'shield':
-            self.color = (100, 255, 100) # Green
-            self.label = "SD"
-        elif self.type == 'slow':
-            self.color = (100, 200, 255) # Blue
-            self.label = "SL"
-        elif self.type == 'health':
-            self.color = (255, 50, 50)   # Red
-            self.label = "H+"
-            
+        power_type = (rng or random).choice(TYPE_NAMES)
+        return self.spawn(x=x, y=y, px=x, py=y, type=TYPE_IDS[power_type], active=True)
+
+    def bounds(self):
+        n = self.count
+        left = self.x[:n].astype(np.int64)
+        top = self.y[:n].astype(np.int64)
+        return left, top, left + SIZE, top + SIZE
+
     def update(self):
-        self.y += self.speed
-        self.rect.y = int(self.y)
-        
-        if self.y > 1000: # Assuming screen height < 1000
-            self.active = False
-            
-    def draw(self, surface):
-        if not self.active: return
-        
-        # Floating effect with sine wave potentially, but simple drop for now
-        # Draw Glassy Box
-        box_surf = pygame.Surface((30, 30), pygame.SRCALPHA)
-        pygame.draw.rect(box_surf, (*self.color, 150), (0, 0, 30, 30), border_radius=5)
-        pygame.draw.rect(box_surf, (255, 255, 255), (0, 0, 30, 30), 2, border_radius=5)
-        
-        # Font
-        font = pygame.font.SysFont("arial", 12, bold=True)
-        text = font.render(self.label, True, (255, 255, 255))
-        text_rect = text.get_rect(center=(15, 15))
-        box_surf.blit(text, text_rect)
-        
-        surface.blit(box_surf, (self.x - 5, self.y - 5))
+        n = self.count
+        if n == 0: return
+        self.px[:n] = self.x[:n]
+        self.py[:n] = self.y[:n]
+        self.y[:n] += SPEED
+        self.active[:n] &= self.y[:n] <= 1000 # Assuming screen height < 1000
+
+    def attract(self, center, radius, rate):
+        """Pulls powerups within `radius` of `center` a `rate` share of the way towards it."""
+        n = self.count
+        if n == 0: return
+        left, top, _, _ = self.bounds()
+        dx = center[0] - (left + SIZE // 2)
+        dy = center[1] - (top + SIZE // 2)
+        near = np.hypot(dx, dy) < radius
+        self.x[:n][near] += dx[near] * rate
+        self.y[:n][near] += dy[near] * rate
+
+    def collect(self, rect):
+        """Deactivates the powerups touching `rect` and returns their type names."""
+        n = self.count
+        if n == 0: return []
+        if n <= DIRECT_MAX_ROWS:
+            rows = [i for i, (alive, x, y) in enumerate(zip(self.active[:n].tolist(), self.x[:n].tolist(), self.y[:n].tolist()))
+                    if alive and int(x) < rect.right and int(x) + SIZE > rect.left and int(y) < rect.bottom and int(y) + SIZE > rect.top]
+            if not rows: return []
+            self.active[rows] = False
+            return [TYPE_NAMES[t] for t in self.type[rows].tolist()]
+        left, top, right, bottom = self.bounds()
+        hit = self.active[:n] & (left < rect.right) & (right > rect.left) & (top < rect.bottom) & (bottom > rect.top)
+        if not hit.any(): return []
+        self.active[:n][hit] = False
+        return [TYPE_NAMES[t] for t in self.type[:n][hit].tolist()]
+
+    def draw(self, surface, alpha=1.0):
+        n = self.count
+        if n == 0: return
+        idx = np.flatnonzero(self.active[:n])
+        x, y = self.x[idx], self.y[idx]
+        if alpha < 1.0:
+            x = x - (x - self.px[idx]) * (1 - alpha)
+            y = y - (y - self.py[idx]) * (1 - alpha)
+        looks = [sprites.get('powerup', label, color, (30, 30)) for color, label in POWERUP_LOOKS.values()]
+        blits = []
+        for t, x, y in zip(self.type[idx].tolist(), x.tolist(), y.tolist()):
+            sprite, (ox, oy) = looks[t]
+            blits.append((sprite, (x + ox, y + oy)))
+        surface.blits(blits, doreturn=False)
+
+def bake_powerup(label, color, size, angle):
+    # Draw Glassy Box
+    box_surf = new_surface(size, pygame.SRCALPHA)
+    pygame.draw.rect(box_surf, (*color, 150), box_surf.get_rect(), border_radius=5)
+    pygame.draw.rect(box_surf, (255, 255, 255), box_surf.get_rect(), 2, border_radius=5)
+    
+    text = text_cache.render(label, 'label')
+    text_rect = text.get_rect(center=box_surf.get_rect().center)
+    box_surf.blit(text, text_rect)
+    return box_surf, (-5, -5)
+
+sprites.register('powerup', bake_powerup)
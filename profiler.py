@@ -0,0 +1,203 @@
+import pygame
+import time
+import csv
+import json
+import numpy as np
+from collections import deque
+from text_cache import fonts
+from render_targets import new_surface
+
+class ProfileWriter:
+    """
+    Streams one record per frame to disk. A `.csv` path gets long-format rows
+    (frame, kind, name, value) so phases that only show up later still fit;
+    anything else gets JSON Lines, one object per frame.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'w', newline='')
+        self.csv = None
+        if path.lower().endswith('.csv'):
+            self.csv = csv.writer(self.file)
+            self.csv.writerow(['frame', 'kind', 'name', 'value'])
+
+    def write(self, frame, phases, counts):
+        if self.csv:
+            self.csv.writerows([frame, 'ms', name, round(ms, 4)] for name, ms in phases.items())
+            self.csv.writerows([frame, 'count', name, n] for name, n in counts.items())
+        else:
+            record = {'frame': frame, 'ms': {name: round(ms, 4) for name, ms in phases.items()}, 'counts': counts}
+            self.file.write(json.dumps(record) + '\n')
+
+    def close(self):
+        self.file.close()
+
+class FrameProfiler:
+    """
+    Splits each frame into named phases with lap timing: `lap(name)` charges
+    the time since the previous lap (or `begin_frame`) to `name`. Keeps a
+    rolling window per phase for mean/p95/p99 and the latest entity counts.
+    Every call returns immediately while the profiler is disabled.
+    """
+    def __init__(self, window=300):
+        self.enabled = False
+        self.window = window
+        self.samples = {}
+        self.counts = {}
+        self.frame = 0
+        self.phases = {}
+        self.frame_counts = {}
+        self.frame_start = 0.0
+        self.last = 0.0
+        self.writer = None
+
+    def begin_frame(self):
+        if not self.enabled: return
+        self.phases = {}
+        self.frame_counts = {}
+        self.frame_start = self.last = time.perf_counter()
+
+    def lap(self, name):
+        if not self.enabled: return
+        now = time.perf_counter()
+        self.phases[name] = self.phases.get(name, 0.0) + (now - self.last) * 1000
+        self.last = now
+
+    def count(self, counts):
+        """Records entity counts (name -> number) for the current frame."""
+        if not self.enabled: return
+        self.frame_counts.update(counts)
+
+    def end_frame(self):
+        if not self.enabled: return
+        phases = self.phases
+        phases['frame'] = (time.perf_counter() - self.frame_start) * 1000
+        for name, ms in phases.items():
+            if name not in self.samples:
+                self.samples[name] = deque(maxlen=self.window)
+        # Phases that didn't run this frame count as 0 so every window covers the same frames
+        for name, window in self.samples.items():
+            window.append(phases.get(name, 0.0))
+        self.counts = self.frame_counts
+        if self.writer:
+            self.writer.write(self.frame, phases, self.counts)
+        self.frame += 1
+
+    def stats(self):
+        """name -> (mean, p95, p99) in milliseconds over the rolling window."""
+        result = {}
+        for name, window in self.samples.items():
+            values = np.fromiter(window, dtype=np.float64, count=len(window))
+            p95, p99 = np.percentile(values, (95, 99))
+            result[name] = (float(values.mean()), float(p95), float(p99))
+        return result
+
+    def reset(self, window=None):
+        """Drops the collected samples, e.g. after a warm-up."""
+        if window is not None:
+            self.window = window
+        self.samples = {}
+        self.counts = {}
+        self.frame = 0
+
+    def record(self, path):
+        """Streams every profiled frame to `path` (CSV or JSON Lines) and turns profiling on."""
+        self.close()
+        self.writer = ProfileWriter(path)
+        self.enabled = True
+
+    def close(self):
+        if self.writer:
+            self.writer.close()
+            self.writer = None
+
+class ProfilerOverlay:
+    """
+    F3 debug panel listing mean/p95/p99 per phase and the entity counts.
+    The panel is rebuilt every `refresh` frames so drawing it stays cheap
+    and the numbers are readable.
+    """
+    def __init__(self, profiler, refresh=30):
+        self.profiler = profiler
+        self.refresh = refresh
+        self.visible = False
+        self.panel = None
+        self.age = 0
+
+    def toggle(self):
+        self.visible = not self.visible
+        self.panel = None
+        if self.visible:
+            self.profiler.enabled = True
+        elif self.profiler.writer is None:
+            self.profiler.enabled = False
+
+    def draw(self, surface):
+        if not self.visible: return
+        self.age += 1
+        if self.panel is None or self.age >= self.refresh:
+            self.panel = self._render()
+            self.age = 0
+        surface.blit(self.panel, (10, 10))
+
+    def _render(self):
+        font = fonts.get('label')
+        rows = [('phase', 'mean', 'p95', 'p99')]
+        stats = self.profiler.stats()
+        total = stats.pop('frame', None)
+        for name, values in stats.items(): # First-seen order, i.e. frame order
+            rows.append((name,) + tuple(f"{v:.2f}" for v in values))
+        if total:
+            rows.append(('frame',) + tuple(f"{v:.2f}" for v in total))
+        counts = "  ".join(f"{name} {n}" for name, n in self.profiler.counts.items())
+
+        # The label font is proportional, so columns are placed explicitly (numbers right-aligned)
+        name_w = max(font.size(row[0])[0] for row in rows) + 12
+        num_w = max(font.size(cell)[0] for row in rows for cell in row[1:]) + 12
+        line_h = font.get_linesize()
+        width = max(name_w + num_w * 3, font.size(counts)[0]) + 16
+        height = line_h * (len(rows) + (1 if counts else 0)) + 12
+        panel = new_surface((width, height), pygame.SRCALPHA)
+        panel.fill((0, 0, 0, 180))
+        color = (200, 255, 200)
+        for i, row in enumerate(rows):
+            y = 6 + i * line_h
+            panel.blit(font.render(row[0], True, color), (8, y))
+            for j, cell in enumerate(row[1:]):
+                text = font.render(cell, True, color)
+                panel.blit(text, (8 + name_w + num_w * (j + 1) - text.get_width(), y))
+        if counts:
+            panel.blit(font.render(counts, True, color), (8, 6 + len(rows) * line_h))
+        return panel
+
+class BootTimer:
+    """
+    Time from launch to the first presented frame, split into the startup
+    steps between `mark` calls. `start` should be taken as early as
+    possible (before the heavy imports); interpreter startup itself is
+    not included.
+    """
+    def __init__(self, start=None):
+        self.start = self.last = start if start is not None else time.perf_counter()
+        self.steps = {}
+        self.total = None
+
+    def mark(self, name):
+        if self.total is not None: return
+        now = time.perf_counter()
+        self.steps[name] = (now - self.last) * 1000
+        self.last = now
+
+    def first_frame(self):
+        """Call right after the first flip; records the total once and returns it in ms."""
+        if self.total is None:
+            self.mark('first_frame')
+            self.total = (self.last - self.start) * 1000
+        return self.total
+
+    def summary(self):
+        steps = ", ".join(f"{name} {ms:.0f}" for name, ms in self.steps.items())
+        return f"Boot: first frame after {self.total:.0f} ms ({steps})"
+
+# Shared so the game loop and the simulation charge their phases to the same frame
+profiler = FrameProfiler()
@@ -0,0 +1,81 @@
+import pygame
+from collections import deque
+
+class AllocationCounter:
+    """Counts surfaces created through `new_surface` and `to_display_format`."""
+    def __init__(self):
+        self.count = 0
+
+# Shared so every module's surface creation shows up in the same tally
+allocations = AllocationCounter()
+
+def new_surface(size, flags=0):
+    """pygame.Surface, counted. Use this for anything created while the game runs."""
+    allocations.count += 1
+    return pygame.Surface(size, flags)
+
+def to_display_format(surface):
+    """
+    Converts `surface` to the display's pixel format so blits skip the
+    per-pixel conversion. Returns it unchanged when there is no display yet
+    (headless runs, bakes before set_mode).
+    """
+    if pygame.display.get_surface() is None:
+        return surface
+    allocations.count += 1
+    if surface.get_flags() & pygame.SRCALPHA:
+        return surface.convert_alpha()
+    return surface.convert()
+
+class RenderTargets:
+    """
+    Long-lived, screen-sized draw targets in the display's format, created on
+    first use and reused every frame instead of allocating a fresh surface.
+
+    Background, world and effects are all drawn into the opaque 'world'
+    target and then blitted once to the screen, offset by the screen shake;
+    the HUD goes straight onto the screen so it never shakes. Keeping them in
+    one opaque target avoids a full-screen alpha composite per layer.
+
+    `begin_frame`/`end_frame` bracket a frame and record how many surfaces
+    were allocated in between, so code that starts allocating per frame
+    shows up in `stats()`.
+    """
+    def __init__(self, screen, history=120):
+        self.screen = screen
+        self.targets = {}
+        self.recent = deque(maxlen=history)
+        self.frame_start = 0
+        self.frame_allocations = 0
+        self.frames = 0
+        self.allocating_frames = 0
+        self.peak = 0
+
+    def get(self, name, alpha=False):
+        target = self.targets.get(name)
+        if target is None:
+            flags = pygame.SRCALPHA if alpha else 0
+            target = to_display_format(new_surface(self.screen.get_size(), flags))
+            self.targets[name] = target
+        return target
+
+    def present(self, name, offset=(0, 0)):
+        """Blits a target onto the screen, e.g. the world layer at the shake offset."""
+        self.screen.blit(self.targets[name], offset)
+
+    def begin_frame(self):
+        self.frame_start = allocations.count
+
+    def end_frame(self):
+        n = allocations.count - self.frame_start
+        self.frame_allocations = n
+        self.frames += 1
+        if n:
+            self.allocating_frames += 1
+            self.peak = max(self.peak, n)
+        self.recent.append(n)
+
+    def stats(self):
+        return {'frames': self.frames, 'allocating_frames': self.allocating_frames,
+                'last': self.frame_allocations, 'peak': self.peak,
+                'recent_mean': sum(self.recent) / len(self.recent) if self.recent else 0.0}
@@ -0,0 +1,116 @@
+import pygame
+import numpy as np
+from collections import deque
+from render_targets import new_surface, to_display_format
+
+class DirtyTracker:
+    """
+    Proxy for the screen that forwards blits and remembers the rect each one
+    touched. Code that needs pygame.draw can use `surface` and `mark` directly.
+    """
+    def __init__(self, surface):
+        self.surface = surface
+        self.rects = []
+
+    def get_size(self):
+        return self.surface.get_size()
+
+    def get_width(self):
+        return self.surface.get_width()
+
+    def get_height(self):
+        return self.surface.get_height()
+
+    def blit(self, source, dest, area=None, special_flags=0):
+        rect = self.surface.blit(source, dest, area, special_flags)
+        self.rects.append(rect)
+        return rect
+
+    def blits(self, blit_sequence, doreturn=True):
+        rects = self.surface.blits(blit_sequence, doreturn=True)
+        self.rects.extend(rects)
+        return rects if doreturn else None
+
+    def mark(self, rects):
+        self.rects.extend(rects)
+
+class DirtyRenderer:
+    """
+    Opt-in renderer that only pushes changed regions to the display.
+
+    The frame is drawn over a static backdrop (background color plus a
+    snapshot of the nebula). Each frame restores the backdrop under last
+    frame's rects, draws through a DirtyTracker and calls
+    pygame.display.update() with the old and new rects. Anything it can't
+    track (screen shake, flashes, full-screen overlays) goes through
+    `full_frame()`, which flips and forces the next tracked frame to repaint
+    everything.
+    """
+    def __init__(self, screen, cell=8, history=120):
+        self.screen = screen
+        self.backdrop = to_display_format(new_surface(screen.get_size()))
+        self.backdrop_key = None
+        self.prev_rects = []
+        self.full = True
+        self.full_frames = 0
+        self.cell = cell
+        self.coverage = deque(maxlen=history)
+        self.frames = 0
+        self.coverage_total = 0.0
+
+    def set_backdrop(self, key, render):
+        """Re-render the backdrop when `key` changes (e.g. on a game state change)."""
+        if key != self.backdrop_key:
+            self.backdrop_key = key
+            render(self.backdrop)
+            self.full = True
+
+    def begin(self):
+        if self.full:
+            self.screen.blit(self.backdrop, (0, 0))
+        else:
+            backdrop = self.backdrop
+            self.screen.blits([(backdrop, r, r) for r in self.prev_rects], doreturn=False)
+        return DirtyTracker(self.screen)
+
+    def end(self, tracker):
+        rects = tracker.rects
+        if self.full:
+            pygame.display.flip()
+            self._record(1.0)
+        else:
+            update = self.prev_rects + rects
+            pygame.display.update(update)
+            self._record(self._covered(update))
+        self.prev_rects = rects
+        self.full = False
+
+    def full_frame(self):
+        pygame.display.flip()
+        self.full = True
+        self.backdrop_key = None # Let the backdrop catch up with anything that drifted meanwhile
+        self.full_frames += 1
+        self._record(1.0)
+
+    def _covered(self, rects):
+        # Union area on a coarse grid, so overlapping rects aren't counted twice
+        w, h = self.screen.get_size()
+        c = self.cell
+        mask = np.zeros(((h + c - 1) // c, (w + c - 1) // c), dtype=np.bool_)
+        screen_rect = self.screen.get_rect()
+        for r in rects:
+            r = screen_rect.clip(r)
+            if r.width and r.height:
+                mask[r.top // c:(r.bottom + c - 1) // c, r.left // c:(r.right + c - 1) // c] = True
+        return float(mask.mean())
+
+    def _record(self, fraction):
+        self.coverage.append(fraction)
+        self.frames += 1
+        self.coverage_total += fraction
+
+    def stats(self):
+        recent = sum(self.coverage) / len(self.coverage) if self.coverage else 0.0
+        mean = self.coverage_total / self.frames if self.frames else 0.0
+        return {'frames': self.frames, 'full_frames': self.full_frames,
+                'recent_percent': recent * 100, 'mean_percent': mean * 100}
@@ -0,0 +1,83 @@
+import os
+import json
+
+# Bit order of the packed per-frame input
+ACTIONS = ('left', 'right', 'shoot', 'emp')
+FORMAT_VERSION = 3 # Bumped when old recordings would no longer play out (or verify) the same
+
+def pack(actions):
+    mask = 0
+    for bit, name in enumerate(ACTIONS):
+        if actions[name]:
+            mask |= 1 << bit
+    return mask
+
+def unpack(mask):
+    return {name: bool(mask & (1 << bit)) for bit, name in enumerate(ACTIONS)}
+
+def numbered_path(path, n):
+    """`path` for the first run of a session, `name-2.ext`, `name-3.ext`... after that."""
+    if n <= 1:
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}-{n}{ext}"
+
+class InputRecorder:
+    """
+    Collects one run's per-frame actions. Inputs are stored as 4-bit masks,
+    run-length encoded as [mask, frames] pairs, so a minute of play is a few
+    hundred numbers. Together with the seed and upgrades that is everything
+    a Simulation needs to play the run again.
+    """
+    def __init__(self, seed, upgrades):
+        self.seed = seed
+        self.upgrades = dict(upgrades)
+        self.inputs = []
+        self.frames = 0
+
+    def record(self, actions):
+        mask = pack(actions)
+        if self.inputs and self.inputs[-1][0] == mask:
+            self.inputs[-1][1] += 1
+        else:
+            self.inputs.append([mask, 1])
+        self.frames += 1
+
+    def save(self, path, fingerprint=None):
+        data = {'version': FORMAT_VERSION, 'seed': self.seed, 'upgrades': self.upgrades,
+                'frames': self.frames, 'inputs': self.inputs, 'fingerprint': fingerprint}
+        with open(path, 'w') as f:
+            json.dump(data, f, separators=(',', ':'))
+
+class InputReplay:
+    """Plays a recording back one frame of actions at a time."""
+    def __init__(self, path):
+        with open(path) as f:
+            data = json.load(f)
+        if data.get('version') != FORMAT_VERSION:
+            raise ValueError(f"{path}: unsupported recording version {data.get('version')}")
+        self.path = path
+        self.seed = data['seed']
+        self.upgrades = data['upgrades']
+        self.frames = data['frames']
+        self.fingerprint = data.get('fingerprint')
+        self.actions = [unpack(mask) for mask, count in data['inputs'] for _ in range(count)]
+        self.position = 0
+
+    @property
+    def done(self):
+        return self.position >= len(self.actions)
+
+    def next(self):
+        """The next frame's actions, or None once the recording is used up."""
+        if self.done:
+            return None
+        actions = self.actions[self.position]
+        self.position += 1
+        return dict(actions)
+
+    def check(self, fingerprint):
+        """Returns a list of fields that differ from the recorded end state (empty when it matches)."""
+        if self.fingerprint is None:
+            return []
+        return [key for key, value in self.fingerprint.items() if fingerprint.get(key) != value]
@@ -1,21 +1,80 @@
 
 import json
 import os
+import time
+import threading
+
+try:
+    import sqlite3
+except ImportError: # Not every Python build ships it (e.g. the browser)
+    sqlite3 = None
 
 SAVE_FILE = "save_data.json"
+COMPACT_EVERY = 32 # Journal entries before the snapshot is rewritten
+LEADERBOARD_SIZE = 5
 
 class SaveManager:
-    def __init__(self):
+    """
+    Progress (credits, upgrades, leaderboard) with write-behind persistence.
+    Mutations change `data` right away and queue a journal entry; a writer
+    thread appends queued entries to `<file>.journal` and every so often
+    rewrites the snapshot atomically (temp file + rename) and empties the
+    journal. Loading replays the journal entries newer than the snapshot.
+    Call `flush()` to wait for everything to be on disk and `close()` on quit.
+    """
+    def __init__(self, path=SAVE_FILE, background=True, profile='PLAYER'):
+        self.path = path
+        self.profile = profile # Name scores are recorded under
+        self.journal_path = path + '.journal'
+        self.seq = 0 # Number of the last mutation applied to `data`
         self.data = self.load()
+        self.revision = 0 # Bumped on every mutation so cached screens know to redraw
+
+        self.cond = threading.Condition()
+        self.pending = [] # (seq, op) not yet in the journal
+        self.journaled = 0 # Journal entries since the last snapshot
+        self.flush_requested = False
+        self.flushes = 0
+        self.closing = False
+        self.writer = None
+        if background:
+            try:
+                self.writer = threading.Thread(target=self._run, name='save-writer', daemon=True)
+                self.writer.start()
+            except RuntimeError: # No threads (the browser build): writes happen on the caller's thread
+                self.writer = None
 
     def load(self):
-        if os.path.exists(SAVE_FILE):
+        data = self.get_default_data()
+        if os.path.exists(self.path):
             try:
-                with open(SAVE_FILE, 'r') as f:
-                    return json.load(f)
-            except:
-                return self.get_default_data()
-        return self.get_default_data()
+                with open(self.path, 'r') as f:
+                    data = json.load(f)
+            except (OSError, ValueError) as e:
+                # Keep the damaged file for inspection instead of silently overwriting it
+                corrupt = self.path + '.corrupt'
+                os.replace(self.path, corrupt)
+                print(f"Save file {self.path} is unreadable ({e}); moved it to {corrupt}")
+        self.seq = data.pop('seq', 0)
+
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path, 'rb+') as f:
+                offset = 0
+                for line in f:
+                    try:
+                        if not line.endswith(b'\n'):
+                            raise ValueError("no line end")
+                        seq, op = json.loads(line)
+                    except ValueError:
+                        # Torn last line from a crash mid-append: cut it off, or the next
+                        # append would be glued onto it and lost on the following load
+                        f.truncate(offset)
+                        break
+                    if seq > self.seq:
+                        self._apply(data, op)
+                        self.seq = seq
+                    offset += len(line)
+        return data
 
     def get_default_data(self):
         return {
@@ -33,25 +92,235 @@ class SaveManager:
             ]
         }
 
-    def save(self):
-        with open(SAVE_FILE, 'w') as f:
-            json.dump(self.data, f)
+    def _apply(self, data, op):
+        """Applies one journaled mutation to `data`; returns False if it changed nothing."""
+        kind = op[0]
+        if kind == 'credits':
+            data['credits'] += op[1]
+        elif kind == 'score':
+            data['leaderboard'].append({'name': op[1], 'score': op[2]})
+            # Sort and keep the top entries
+            data['leaderboard'].sort(key=lambda x: x['score'], reverse=True)
+            data['leaderboard'] = data['leaderboard'][:LEADERBOARD_SIZE]
+        elif kind == 'upgrade':
+            item_name, cost = op[1], op[2]
+            if data['credits'] < cost:
+                return False
+            data['credits'] -= cost
+            data['upgrades'][item_name] += 1
+        return True
+
+    def _mutate(self, op):
+        with self.cond:
+            if not self._apply(self.data, op):
+                return False
+            self.seq += 1
+            self.pending.append((self.seq, op))
+            self.cond.notify_all()
+        self.revision += 1
+        if self.writer is None:
+            self._write()
+        return True
 
     def add_score(self, name, score):
-        self.data['leaderboard'].append({'name': name, 'score': score})
-        # Sort and keep top 5
-        self.data['leaderboard'].sort(key=lambda x: x['score'], reverse=True)
-        self.data['leaderboard'] = self.data['leaderboard'][:5]
-        self.save()
+        self._mutate(('score', name, score))
 
     def add_credits(self, amount):
-        self.data['credits'] += amount
-        self.save()
+        self._mutate(('credits', amount))
 
     def upgrade_item(self, item_name, cost):
-        if self.data['credits'] >= cost:
-            self.data['credits'] -= cost
-            self.data['upgrades'][item_name] += 1
-            self.save()
-            return True
-        return False
+        return self._mutate(('upgrade', item_name, cost))
+
+    def flush(self):
+        """Writes a fresh snapshot with every mutation so far and blocks until it is on disk."""
+        if self.writer is None:
+            self._write(compact=True)
+            return
+        with self.cond:
+            self.flush_requested = True
+            target = self.flushes + 1
+            self.cond.notify_all()
+            while self.flushes < target and self.writer.is_alive():
+                self.cond.wait(0.1)
+
+    def close(self):
+        """Flushes and stops the writer thread."""
+        self.flush()
+        if self.writer:
+            with self.cond:
+                self.closing = True
+                self.cond.notify_all()
+            self.writer.join()
+            self.writer = None
+
+    def _run(self):
+        while True:
+            with self.cond:
+                while not (self.pending or self.flush_requested or self.closing):
+                    self.cond.wait()
+                if self.closing and not (self.pending or self.flush_requested):
+                    return
+            self._write()
+
+    def _write(self, compact=False):
+        # Only the in-memory copy happens under the lock; the disk I/O runs outside it
+        with self.cond:
+            entries, self.pending = self.pending, []
+            flushing = self.flush_requested
+            self.flush_requested = False
+            state = self._capture(entries, compact or flushing)
+        self._persist(entries, state)
+
+        if flushing:
+            with self.cond:
+                self.flushes += 1
+                self.cond.notify_all()
+
+    def _capture(self, entries, compact):
+        """Called under the lock: copies whatever `_persist` needs from `data`."""
+        if compact or self.journaled + len(entries) >= COMPACT_EVERY:
+            return json.dumps({**self.data, 'seq': self.seq})
+        return None
+
+    def _persist(self, entries, snapshot):
+        try:
+            if snapshot is not None:
+                tmp = self.path + '.tmp'
+                with open(tmp, 'w') as f:
+                    f.write(snapshot)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp, self.path)
+                # A crash before this leaves journal entries the snapshot already covers; load skips them
+                if os.path.exists(self.journal_path):
+                    os.remove(self.journal_path)
+                self.journaled = 0
+            elif entries:
+                with open(self.journal_path, 'a') as f:
+                    f.write(''.join(json.dumps(entry) + '\n' for entry in entries))
+                    f.flush()
+                    os.fsync(f.fileno())
+                self.journaled += len(entries)
+        except OSError as e:
+            print(f"Could not write {self.path}: {e}")
+            self.journaled = COMPACT_EVERY # Retry with a full snapshot on the next write
+
+LEGACY_PROFILE = 'PLAYER' # The JSON save only ever had this pilot
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS profiles (
+    name TEXT PRIMARY KEY,
+    credits INTEGER NOT NULL DEFAULT 0,
+    upgrades TEXT NOT NULL,
+    created REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    profile TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    played REAL
+);
+CREATE INDEX IF NOT EXISTS runs_by_score ON runs (score DESC);
+CREATE INDEX IF NOT EXISTS runs_by_profile ON runs (profile, score DESC);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+class SQLiteSaveManager(SaveManager):
+    """
+    SaveManager backed by SQLite (WAL mode) for machines shared by many
+    pilots: one row of credits/upgrades per profile and every run ever
+    played in `runs`. Top-K and per-profile bests are index scans, so they
+    stay cheap however long the history gets; the menu reads the copy in
+    `data['leaderboard']` that new scores are merged into. The writer
+    thread inserts queued scores in one transaction per batch. A new
+    database imports the JSON save file once, if there is one.
+    """
+    def __init__(self, path, profile=LEGACY_PROFILE, background=True, json_path=SAVE_FILE):
+        self.json_path = json_path
+        self.db = sqlite3.connect(path) # Reads, on the game thread
+        self.write_db = None # Opened by the writing thread on its first batch
+        self.db.execute("PRAGMA journal_mode=WAL") # Readers never wait for the writer
+        with self.db:
+            self.db.executescript(SCHEMA)
+        if self.db.execute("SELECT value FROM meta WHERE key = 'source'").fetchone() is None:
+            self._migrate(path)
+        super().__init__(path, background, profile)
+
+    def _migrate(self, path):
+        source = 'none'
+        with self.db:
+            if os.path.exists(self.json_path):
+                legacy = SaveManager(self.json_path, background=False).data
+                source = self.json_path
+                # The JSON save starts out with placeholder scores; those were never played
+                placeholders = self.get_default_data()['leaderboard']
+                runs = [(entry['name'], entry['score']) for entry in legacy['leaderboard'] if entry not in placeholders]
+                self.db.execute("INSERT OR IGNORE INTO profiles (name, credits, upgrades, created) VALUES (?, ?, ?, ?)",
+                                (LEGACY_PROFILE, legacy['credits'], json.dumps(legacy['upgrades']), time.time()))
+                self.db.executemany("INSERT INTO runs (profile, score, played) VALUES (?, ?, NULL)", runs)
+            self.db.execute("INSERT INTO meta (key, value) VALUES ('source', ?)", (source,))
+        if source != 'none':
+            print(f"Imported {self.json_path} into {path}")
+
+    def load(self):
+        row = self.db.execute("SELECT credits, upgrades FROM profiles WHERE name = ?", (self.profile,)).fetchone()
+        if row is None:
+            credits, upgrades = 0, self.get_default_data()['upgrades']
+            with self.db:
+                self.db.execute("INSERT INTO profiles (name, credits, upgrades, created) VALUES (?, ?, ?, ?)",
+                                (self.profile, credits, json.dumps(upgrades), time.time()))
+        else:
+            credits, upgrades = row[0], json.loads(row[1])
+        return {'credits': credits, 'upgrades': upgrades, 'leaderboard': self.top_scores(LEADERBOARD_SIZE)}
+
+    def top_scores(self, k=LEADERBOARD_SIZE):
+        rows = self.db.execute("SELECT profile, score FROM runs ORDER BY score DESC LIMIT ?", (k,))
+        return [{'name': name, 'score': score} for name, score in rows]
+
+    def best_score(self, profile=None):
+        row = self.db.execute("SELECT MAX(score) FROM runs WHERE profile = ?", (profile or self.profile,)).fetchone()
+        return row[0] or 0
+
+    def profiles(self):
+        return [name for name, in self.db.execute("SELECT name FROM profiles ORDER BY name")]
+
+    def select_profile(self, name):
+        """Switches pilots; the current pilot's queued changes are written first."""
+        self.flush()
+        with self.cond:
+            self.profile = name
+            self.data = self.load()
+        self.revision += 1
+
+    def _capture(self, entries, compact):
+        return self.profile, self.data['credits'], json.dumps(self.data['upgrades'])
+
+    def _persist(self, entries, state):
+        if not entries:
+            return
+        profile, credits, upgrades = state
+        runs = [(op[1], op[2], time.time()) for _, op in entries if op[0] == 'score']
+        try:
+            if self.write_db is None:
+                self.write_db = sqlite3.connect(self.path, check_same_thread=False)
+                self.write_db.execute("PRAGMA synchronous=NORMAL") # Durable at checkpoints, which is enough in WAL mode
+            with self.write_db: # One transaction per batch
+                self.write_db.executemany("INSERT INTO runs (profile, score, played) VALUES (?, ?, ?)", runs)
+                self.write_db.execute("UPDATE profiles SET credits = ?, upgrades = ? WHERE name = ?",
+                                      (credits, upgrades, profile))
+        except sqlite3.Error as e:
+            print(f"Could not write {self.path}: {e}")
+
+    def close(self):
+        super().close()
+        if self.write_db:
+            self.write_db.close()
+        self.db.close()
+
+def open_save(db_path=None, profile=LEGACY_PROFILE):
+    """The SQLite store when `db_path` is given and sqlite3 is available, the JSON file otherwise."""
+    if db_path and sqlite3 is None:
+        print("sqlite3 is not available here; keeping progress in the JSON save file")
+    if db_path and sqlite3 is not None:
+        return SQLiteSaveManager(db_path, profile)
+    return SaveManager(profile=profile)
@@ -0,0 +1,300 @@
+import random
+import zlib
+import numpy as np
+
+from player import Player
+from level import LevelManager
+from enemy import ARCHETYPES
+from effects import ParticleSystem, Explosion, FloatingTextField, LAYER_UNDER, LAYER_OVER
+from powerup import PowerUpField
+from bullet import BulletField
+from profiler import profiler
+
+TICK_RATE = 60 # Simulation updates per second; speeds and timers in the game rules are per tick
+FRAME_MS = 1000 / TICK_RATE # Simulated time per update
+
+def no_input():
+    return {'left': False, 'right': False, 'shoot': False, 'emp': False}
+
+class Simulation:
+    """
+    One run of the game world: player, level, projectiles and the collision
+    rules between them. Drawing is left to the caller, and sound/shake hooks
+    are optional so the same rules can run without a window.
+
+    Randomness comes from two streams seeded from `seed`: `rng` for gameplay
+    (spawns, boss patterns, drops) and a separate NumPy stream for particles,
+    so effects never shift the simulation. The same seed and inputs replay
+    the same run.
+    """
+    def __init__(self, screen_width, screen_height, upgrades=None, sound_manager=None, screen_shake=None, visuals=True, seed=None):
+        self.screen_width = screen_width
+        self.screen_height = screen_height
+        self.sound_manager = sound_manager
+        self.screen_shake = screen_shake
+        self.seed = seed if seed is not None else random.randrange(2**32)
+        self.rng = random.Random(self.seed)
+        self.visuals = visuals # False skips purely cosmetic objects (trail, explosions, texts)
+        self.particles = ParticleSystem(rng=np.random.default_rng([self.seed, 1])) if visuals else None
+
+        self.player = Player(screen_width, screen_height, upgrades=upgrades, particles=self.particles)
+        self.level_manager = LevelManager(screen_width, screen_height, rng=self.rng)
+
+        # Entity stores (enemies live in the level manager)
+        self.bullets = BulletField()
+        self.enemy_bullets = BulletField()
+        self.powerups = PowerUpField()
+        self.floating_texts = FloatingTextField()
+
+        # Game State
+        self.combo = 1
+        self.combo_timer = 0
+        self.flash_alpha = 0
+        self.time_ms = 0
+        self.frame = 0
+        self.game_over = False
+
+        # Transition State
+        self.last_level = 1
+        self.boss_was_active = False
+        self.level_text_timer = 0
+        self.low_health_sound_timer = 0
+
+    def start(self):
+        self.level_manager.start_level()
+        self.last_level = self.level_manager.level
+        self.level_text_timer = 90
+
+    def _play(self, name):
+        if self.sound_manager:
+            self.sound_manager.play(name)
+
+    def _shake(self, duration, intensity):
+        if self.screen_shake:
+            self.screen_shake.start(duration, intensity)
+
+    def _explode(self, x, y, **kwargs):
+        if self.visuals:
+            Explosion(self.particles, x, y, **kwargs)
+
+    def _float_text(self, x, y, text, *args):
+        if self.visuals:
+            self.floating_texts.add(x, y, text, *args)
+
+    def update(self, actions):
+        """Advance the world by one frame. `actions` holds left/right/shoot/emp flags."""
+        if self.flash_alpha > 0: self.flash_alpha -= 10
+        if self.game_over: return
+        player = self.player
+        level_manager = self.level_manager
+        self.frame += 1
+        self.time_ms += FRAME_MS
+
+        if actions['shoot']:
+            if player.shoot(self.time_ms, self.bullets):
+                self._play('shoot')
+        if actions['emp']:
+            if player.activate_secondary():
+                self._play('boss_enter') # Reuse for deep rumble
+                self._shake(20, 10)
+
+        player.update(int(actions['right']) - int(actions['left']), FRAME_MS)
+        profiler.lap('player.update')
+        level_manager.update(player.rect, self.enemy_bullets)
+        profiler.lap('level_manager.update')
+
+        # Combo Logic
+        if self.combo_timer > 0:
+            self.combo_timer -= 1
+        else:
+            self.combo = 1
+
+        # Level / Boss Detect
+        if level_manager.level > self.last_level:
+            self._play('level_complete')
+            self.level_text_timer = 90 # 1.5 seconds
+            self.last_level = level_manager.level
+
+        if level_manager.boss_active and not self.boss_was_active:
+            self._play('boss_enter')
+            self.boss_was_active = True
+        elif not level_manager.boss_active:
+            self.boss_was_active = False
+
+        if self.level_text_timer > 0: self.level_text_timer -= 1
+
+        self.bullets.update()
+        self.enemy_bullets.update()
+        profiler.lap('bullets.update')
+
+        # Magnet Upgrade Logic
+        self.powerups.update()
+        if player.upgrades['magnet'] > 0:
+            self.powerups.attract(player.rect.center, 100 + player.upgrades['magnet'] * 50, 0.05)
+        profiler.lap('powerups.update')
+
+        self._collide()
+
+        self.bullets.compact()
+        self.enemy_bullets.compact()
+        self.powerups.remove_inactive()
+        profiler.lap('compact')
+        if self.particles: self.particles.update()
+        self.floating_texts.update()
+        profiler.lap('effects.update')
+
+        if player.health <= player.max_health * 0.3:
+            self.low_health_sound_timer -= 1
+            if self.low_health_sound_timer <= 0:
+                self._play('low_health')
+                self.low_health_sound_timer = 30 # 0.5s
+
+        if player.health <= 0:
+            self.game_over = True
+
+    def _collide(self):
+        player = self.player
+        level_manager = self.level_manager
+
+        enemies = level_manager.enemies
+        enemies.update(slow_active=player.slow_motion_active, player_rect=player.rect, bullets=self.enemy_bullets, time_ms=self.time_ms)
+        profiler.lap('enemies.update')
+
+        if len(enemies):
+            self._collide_enemies(enemies)
+
+        bullets = self.bullets
+        boss = level_manager.boss
+        if level_manager.boss_active and boss:
+            for i in bullets.hits_rect(boss.rect):
+                bullets.active[i] = False
+                if boss.take_damage(5):
+                    self._explode(boss.rect.centerx, boss.rect.centery, color=(200, 50, 200))
+                    self._play('explosion')
+                    player.score += 500
+                    self._shake(30, 10)
+        profiler.lap('collide.boss')
+
+        hits = self.enemy_bullets.hits_rect(player.rect)
+        self.enemy_bullets.active[hits] = False
+        for _ in hits:
+            if not player.shield_active:
+                player.take_damage(10)
+                self._play('damage')
+                self.flash_alpha = 100
+                self._shake(5, 3)
+        profiler.lap('collide.enemy_bullets')
+
+        for power_type in self.powerups.collect(player.rect):
+            player.activate_powerup(power_type)
+            self._play('powerup')
+        profiler.lap('collide.powerups')
+
+    def _collide_enemies(self, enemies):
+        player = self.player
+        # Enemy rects as column arrays, computed once this tick and shared by the grid and
+        # all three checks; `alive` is a view, so kills below are seen by the later checks
+        left, top, right, bottom = enemies.bounds()
+        alive = enemies.active[:enemies.count]
+
+        # EMP vs Enemies
+        if player.emp_active:
+            px, py = player.rect.center
+            for j in enemies.within(px, py, player.emp_radius):
+                alive[j] = False
+                player.score += 10 * self.combo
+                self._float_text(int(left[j]), int(top[j]), f"+{10*self.combo}", (0, 255, 255))
+                self._explode(*enemies.center(j))
+        profiler.lap('collide.emp')
+
+        for j in enemies.touching(player.rect):
+            alive[j] = False
+            self._explode(*enemies.center(j))
+            if not player.shield_active:
+                player.take_damage(20)
+                self.flash_alpha = 150
+                self._shake(15, 8)
+                self._play('damage')
+            else:
+                self._play('explosion')
+                player.score += 10
+        profiler.lap('collide.contact')
+
+        # Player bullets vs Enemies: each bullet stops at the first live enemy it overlaps
+        bullets = self.bullets
+        for i, hit in bullets.hits_boxes(left, top, right, bottom, grid=enemies.index()):
+            for j in hit:
+                if alive[j]:
+                    bullets.active[i] = False
+                    if enemies.take_damage(j, 10):
+                        cx, cy = enemies.center(j)
+                        self._explode(cx, cy)
+                        self._play('explosion')
+                        player.score += 10 * self.combo
+                        self._float_text(int(left[j]), int(top[j]), f"+{10*self.combo}")
+                        self.combo += 1
+                        self.combo_timer = 120 # 2 seconds
+                        if self.rng.random() < 0.1: self.powerups.add(cx, cy, self.rng)
+                    break
+        profiler.lap('collide.bullets')
+
+    def draw(self, surface, alpha=1.0):
+        """`alpha` is how far rendering is between the last two updates (1.0 draws the latest state)."""
+        self.powerups.draw(surface, alpha)
+        profiler.lap('draw.powerups')
+        self.bullets.draw(surface, alpha)
+        self.enemy_bullets.draw(surface, alpha)
+        profiler.lap('draw.bullets')
+        self.level_manager.enemies.draw(surface, alpha)
+        if self.level_manager.boss: self.level_manager.boss.draw(surface, alpha)
+        profiler.lap('draw.enemies')
+        if self.particles: self.particles.draw(surface, LAYER_UNDER, alpha)
+        self.player.draw(surface, alpha)
+        if self.particles: self.particles.draw(surface, LAYER_OVER, alpha)
+        profiler.lap('draw.player_particles')
+        self.floating_texts.draw(surface, alpha)
+        profiler.lap('draw.texts')
+
+    def fingerprint(self):
+        """Summary of the game state, compared after a replay to prove it matched the recording."""
+        player = self.player
+        boss = self.level_manager.boss
+        digest = zlib.crc32(repr(('boss', boss.x, boss.y, boss.health) if boss else None).encode())
+        enemies = self.level_manager.enemies
+        n = enemies.count
+        # Type names rather than ids, which follow the order of the enemy data file
+        names = ' '.join(ARCHETYPES[t].name for t in enemies.type[:n].tolist())
+        digest = zlib.crc32(names.encode() + enemies.x[:n].tobytes() + enemies.y[:n].tobytes() + enemies.health[:n].tobytes(), digest)
+        for field in (self.bullets, self.enemy_bullets):
+            n = field.count
+            digest = zlib.crc32(field.x[:n].tobytes() + field.y[:n].tobytes(), digest)
+        return {'frame': self.frame, 'score': player.score, 'health': player.health, 'x': player.x,
+                'level': self.level_manager.level, 'enemies': len(self.level_manager.enemies),
+                'bullets': self.bullets.count, 'enemy_bullets': self.enemy_bullets.count, 'crc': digest}
+
+    def entity_counts(self):
+        return {'bullets': self.bullets.count, 'enemy_bullets': self.enemy_bullets.count,
+                'enemies': len(self.level_manager.enemies),
+                'particles': len(self.particles) if self.particles else 0}
+
+def autopilot(sim):
+    """Simple scripted pilot for headless runs: chase the lowest enemy and keep firing."""
+    player = sim.player
+    actions = no_input()
+    actions['shoot'] = True
+    target = None # (centerx, bottom)
+    enemies = sim.level_manager.enemies
+    if len(enemies):
+        _, _, _, bottom = enemies.bounds()
+        j = int(np.argmax(bottom))
+        target = (enemies.center(j)[0], int(bottom[j]))
+    boss = sim.level_manager.boss
+    if boss and (target is None or boss.rect.bottom > target[1]):
+        target = (boss.rect.centerx, boss.rect.bottom)
+    if target:
+        centerx, bottom = target
+        if centerx < player.rect.centerx - 5: actions['left'] = True
+        elif centerx > player.rect.centerx + 5: actions['right'] = True
+        if player.emp_energy >= 100 and bottom > player.rect.top - 200:
+            actions['emp'] = True
+    return actions
@@ -1,16 +1,77 @@
 
 import pygame
 import os
+import threading
+
+VOICES = 12 # Mixer channels for effects; music streams separately and never takes one
+RESERVED_VOICES = 2 # Kept free for critical cues
+
+# name -> (priority, cooldown ms, critical). Higher priority wins a voice first;
+# a sound played again within its cooldown is dropped.
+SOUND_RULES = {
+    'boss_enter': (100, 500, True),
+    'game_over': (100, 500, True),
+    'low_health': (90, 400, True),
+    'level_complete': (80, 500, True),
+    'damage': (70, 100, False),
+    'powerup': (60, 100, False),
+    'explosion': (40, 60, False),
+    'shoot': (10, 50, False),
+}
+DEFAULT_RULE = (50, 0, False)
 
 class SoundManager:
-    def __init__(self):
+    """
+    Sound effects go through a queue: `play()` only records the request and
+    `update()`, once per frame, starts them. Requests for a sound already
+    queued this frame are merged, sounds within their cooldown are dropped,
+    and the rest start in priority order while voices are free. Critical
+    cues may also use the reserved channels. `counters` totals what was
+    played, merged and dropped. Until the sounds have loaded, requests
+    are ignored and music starts once it is ready.
+    """
+    def __init__(self, background=True):
         self.sounds = {}
-        pygame.mixer.init()
-        self.load_sounds()
+        self.queue = []
+        self.last_played = {}
+        self.counters = {'played': 0, 'merged': 0, 'dropped_cooldown': 0, 'dropped_voices': 0}
+        # Opening the audio device and decoding the WAVs happens off the first frames:
+        # on a thread, or one step per update() where threads aren't available (the browser)
+        self.ready = False
+        self.music_requested = False
+        self.music_playing = False
+        self.loader = None
+        if background:
+            try:
+                threading.Thread(target=self._load_all, name='sound-loader', daemon=True).start()
+            except RuntimeError:
+                background = False
+        if not background:
+            self.loader = self._load_steps()
+
+    def _load_all(self):
+        for _ in self._load_steps():
+            pass
+
+    def _load_steps(self):
+        try:
+            pygame.mixer.init()
+        except pygame.error as e:
+            print(f"Sound disabled: {e}")
+            return
+        pygame.mixer.set_num_channels(VOICES)
+        pygame.mixer.set_reserved(RESERVED_VOICES) # find_channel() leaves these alone
+        yield
+        sounds = {}
+        for name, path in self.sound_files().items():
+            sounds[name] = self.load_sound(name, path)
+            yield
+        self.sounds = sounds
+        self.ready = True
 
-    def load_sounds(self):
+    def sound_files(self):
         # Sound file paths
-        sound_files = {
+        return {
             'shoot': 'assets/sounds/shoot.wav',
             'explosion': 'assets/sounds/explosion.wav',
             'powerup': 'assets/sounds/powerup.wav',
@@ -21,26 +82,66 @@ class SoundManager:
             'level_complete': 'assets/sounds/level_complete.wav',
             'low_health': 'assets/sounds/low_health.wav'
         }
-        
-        for name, path in sound_files.items():
-            if os.path.exists(path):
-                try:
-                    if name == 'music':
-                        pygame.mixer.music.load(path)
-                        self.sounds['music'] = True
-                    else:
-                        self.sounds[name] = pygame.mixer.Sound(path)
-                except Exception as e:
-                    print(f"Error loading sound {path}: {e}")
-                    self.sounds[name] = None
-            else:
-                self.sounds[name] = None
+
+    def load_sound(self, name, path):
+        if not os.path.exists(path):
+            return None
+        try:
+            if name == 'music':
+                pygame.mixer.music.load(path)
+                return True
+            return pygame.mixer.Sound(path)
+        except Exception as e:
+            print(f"Error loading sound {path}: {e}")
+            return None
 
     def play(self, name):
-        if name in self.sounds and self.sounds[name]:
-            if name != 'music':
-                self.sounds[name].play()
+        """Queues a sound for the next `update()`."""
+        if name == 'music' or not self.sounds.get(name):
+            return
+        if name in self.queue:
+            self.counters['merged'] += 1
+        else:
+            self.queue.append(name)
+
+    def update(self, now=None):
+        """Starts this frame's queued sounds (and advances loading until it is done)."""
+        if not self.ready:
+            if self.loader is not None:
+                next(self.loader, None)
+            self.queue.clear() # Nothing can play yet
+            return
+        if self.music_requested and not self.music_playing:
+            self.play_music()
+        if not self.queue:
+            return
+        now = pygame.time.get_ticks() if now is None else now
+        for name in sorted(self.queue, key=lambda n: SOUND_RULES.get(n, DEFAULT_RULE)[0], reverse=True):
+            _, cooldown, critical = SOUND_RULES.get(name, DEFAULT_RULE)
+            if now - self.last_played.get(name, -cooldown) < cooldown:
+                self.counters['dropped_cooldown'] += 1
+                continue
+            channel = pygame.mixer.find_channel()
+            if channel is None and critical:
+                channel = self._reserved_channel()
+            if channel is None:
+                self.counters['dropped_voices'] += 1
+                continue
+            channel.play(self.sounds[name])
+            self.last_played[name] = now
+            self.counters['played'] += 1
+        self.queue.clear()
+
+    def _reserved_channel(self):
+        for i in range(RESERVED_VOICES):
+            channel = pygame.mixer.Channel(i)
+            if not channel.get_busy():
+                return channel
+        return pygame.mixer.Channel(0) # All busy: the critical cue takes over the first one
     
     def play_music(self):
-        if 'music' in self.sounds and self.sounds['music']:
+        """Starts the music loop, or as soon as loading finishes."""
+        self.music_requested = True
+        if self.ready and self.sounds.get('music') and not self.music_playing:
             pygame.mixer.music.play(-1) # Loop indefinitely
+            self.music_playing = True
@@ -0,0 +1,67 @@
+import numpy as np
+
+class SpatialHash:
+    """
+    Uniform grid broad-phase over boxes given as (left, top, right, bottom)
+    integer arrays, e.g. the columns of an entity store. Every box is binned
+    into each cell it overlaps, as a sorted array of (cell, box) entries, so
+    `pairs` only matches query boxes against boxes sharing one of their
+    cells; callers still run the exact test on those candidates.
+
+    `rebuild` only takes the boxes; binning happens on the first `pairs`
+    call after it, so a tick that never needs the grid doesn't pay for it.
+    Below `linear_limit` boxes binning costs more than it saves and `pairs`
+    returns every combination.
+    """
+    def __init__(self, cell_size=80, linear_limit=16):
+        self.cell_size = cell_size
+        self.linear_limit = linear_limit
+        self.count = 0
+        self.linear = True
+        self.boxes = None
+        self.keys = self.items = None
+
+    def _cells(self, left, top, right, bottom):
+        """(cell key, box index) for every cell each box overlaps."""
+        size = self.cell_size
+        x0, x1 = left // size, (right - 1) // size
+        y0, y1 = top // size, (bottom - 1) // size
+        w, h = x1 - x0 + 1, y1 - y0 + 1
+        per_box = w * h
+        index = np.repeat(np.arange(len(left)), per_box)
+        # Position of each entry within its box's w*h block of cells
+        k = np.arange(len(index)) - np.repeat(np.cumsum(per_box) - per_box, per_box)
+        cx = x0[index] + k % w[index]
+        cy = y0[index] + k // w[index]
+        # Cells are packed into one int64 key (coordinates are far below 2**31)
+        return (cx << 32) + cy, index
+
+    def rebuild(self, left, top, right, bottom):
+        self.count = len(left)
+        self.linear = self.count <= self.linear_limit
+        self.boxes = (left, top, right, bottom)
+        self.keys = self.items = None
+
+    def _bin(self):
+        keys, index = self._cells(*self.boxes)
+        order = np.argsort(keys, kind='stable')
+        self.keys, self.items = keys[order], index[order]
+
+    def pairs(self, left, top, right, bottom):
+        """
+        Candidate (query index, box index) pairs for many query boxes at once.
+        A pair sharing several cells is listed once per cell and the order is
+        arbitrary; run the exact test first and dedupe the (few) hits after.
+        """
+        if self.linear:
+            q, b = np.meshgrid(np.arange(len(left)), np.arange(self.count), indexing='ij')
+            return q.ravel(), b.ravel()
+        if self.keys is None:
+            self._bin()
+        keys, query = self._cells(left, top, right, bottom)
+        start = np.searchsorted(self.keys, keys, 'left')
+        found = np.searchsorted(self.keys, keys, 'right') - start
+        # Expand every query entry into one pair per box in the matching cell
+        q = np.repeat(query, found)
+        offsets = np.arange(len(q)) - np.repeat(np.cumsum(found) - found, found)
+        return q, self.items[np.repeat(start, found) + offsets]
@@ -0,0 +1,87 @@
+import os
+import json
+import inspect
+import hashlib
+import pygame
+from render_targets import to_display_format
+
+def baker_hash(bakers):
+    """Hash of the bakers' source, so an atlas built from older drawing code is noticed."""
+    digest = hashlib.sha256()
+    for kind in sorted(bakers):
+        digest.update(kind.encode())
+        digest.update(inspect.getsource(bakers[kind]).encode())
+    return digest.hexdigest()
+
+def _key(parts):
+    # JSON turns the tuples in a key into lists
+    return tuple(tuple(p) if isinstance(p, list) else p for p in parts)
+
+class SpriteCache:
+    """
+    Lazily baked entity visuals keyed by (kind, type, color, size, angle).
+
+    Each entity module registers a baker for its kind; the first `get` for a
+    key calls it and keeps the result, every later call is a dict lookup.
+    Bakers return (surface, offset) where offset is where the surface's
+    top-left sits relative to the entity's anchor point.
+
+    `load_atlas` prefills the cache from a prebuilt atlas (see atlas.py):
+    one image decode, and every sprite is a subsurface of that texture.
+    Keys missing from the atlas are still baked on demand.
+    """
+    def __init__(self):
+        self.bakers = {}
+        self.sprites = {}
+        self.hits = 0
+        self.misses = 0
+        self.bytes = 0
+        self.atlas = None
+
+    def register(self, kind, baker):
+        self.bakers[kind] = baker
+
+    def get(self, kind, sprite_type=None, color=None, size=None, angle=0):
+        key = (kind, sprite_type, color, size, angle)
+        sprite = self.sprites.get(key)
+        if sprite is not None:
+            self.hits += 1
+            return sprite
+
+        self.misses += 1
+        surface, offset = self.bakers[kind](sprite_type, color, size, angle)
+        surface = to_display_format(surface)
+        self.bytes += surface.get_width() * surface.get_height() * surface.get_bytesize()
+        sprite = (surface, offset)
+        self.sprites[key] = sprite
+        return sprite
+
+    def load_atlas(self, image_path, index_path):
+        """Returns the number of sprites loaded; 0 when the atlas is missing or stale."""
+        if not (os.path.exists(image_path) and os.path.exists(index_path)):
+            return 0
+        with open(index_path) as f:
+            index = json.load(f)
+        kinds = {entry['key'][0] for entry in index['sprites']}
+        if any(kind not in self.bakers for kind in kinds) or \
+                index['bakers'] != baker_hash({kind: self.bakers[kind] for kind in kinds}):
+            print(f"{image_path} was built from different drawing code; baking sprites at runtime instead "
+                  f"(rebuild it with `python atlas.py`)")
+            return 0
+
+        self.atlas = to_display_format(pygame.image.load(image_path))
+        for entry in index['sprites']:
+            self.sprites[_key(entry['key'])] = (self.atlas.subsurface(entry['rect']), tuple(entry['offset']))
+        self.bytes += self.atlas.get_width() * self.atlas.get_height() * self.atlas.get_bytesize()
+        return len(index['sprites'])
+
+    def clear(self):
+        self.sprites = {}
+        self.atlas = None
+        self.bytes = 0
+
+    def stats(self):
+        return {'sprites': len(self.sprites), 'hits': self.hits, 'misses': self.misses, 'bytes': self.bytes}
+
+# Shared by every entity so identical visuals are only baked once
+sprites = SpriteCache()
@@ -0,0 +1,73 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from save_manager import SaveManager, SQLiteSaveManager
+
+def test_append_after_torn_journal_survives_reload(tmp_path):
+    path = str(tmp_path / "save_data.json")
+    save = SaveManager(path, background=False)
+    save.add_credits(100)
+    save.flush() # Snapshot at 100
+    save.add_credits(5) # Journaled, not yet in the snapshot
+
+    # A crash mid-append leaves half a line at the end of the journal
+    with open(save.journal_path, 'a') as f:
+        f.write('[3, ["cred')
+
+    save = SaveManager(path, background=False)
+    assert save.data['credits'] == 105
+    save.add_credits(7)
+
+    assert SaveManager(path, background=False).data['credits'] == 112
+
+def test_sqlite_imports_legacy_json(tmp_path):
+    json_path = str(tmp_path / "save_data.json")
+    legacy = SaveManager(json_path, background=False)
+    legacy.add_credits(250)
+    legacy.upgrade_item('speed', 100)
+    legacy.add_score('PLAYER', 1200)
+    legacy.close()
+
+    save = SQLiteSaveManager(str(tmp_path / "saves.db"), background=False, json_path=json_path)
+    assert save.data['credits'] == 150
+    assert save.data['upgrades']['speed'] == 1
+    # The JSON's placeholder scores are not imported as runs
+    assert save.data['leaderboard'] == [{'name': 'PLAYER', 'score': 1200}]
+    save.close()
+
+def test_sqlite_without_legacy_json_starts_empty(tmp_path):
+    save = SQLiteSaveManager(str(tmp_path / "saves.db"), background=False, json_path=str(tmp_path / "missing.json"))
+    assert save.top_scores() == []
+    assert save.best_score() == 0
+    save.close()
+
+def test_sqlite_top_scores_and_profile_best(tmp_path):
+    save = SQLiteSaveManager(str(tmp_path / "saves.db"), background=False, json_path=str(tmp_path / "missing.json"))
+    for score in (300, 900, 100):
+        save.add_score('ACE', score)
+    save.select_profile('NEO')
+    for score in (500, 700):
+        save.add_score('NEO', score)
+
+    assert save.top_scores(3) == [{'name': 'ACE', 'score': 900}, {'name': 'NEO', 'score': 700},
+                                  {'name': 'NEO', 'score': 500}]
+    assert save.best_score('ACE') == 900
+    assert save.best_score() == 700 # The selected pilot
+    assert save.best_score('ZOE') == 0
+    save.close()
+
+def test_sqlite_reopen_keeps_progress_in_wal_mode(tmp_path):
+    path = str(tmp_path / "saves.db")
+    save = SQLiteSaveManager(path, profile='ZOE', background=False, json_path=str(tmp_path / "missing.json"))
+    save.add_credits(40)
+    save.add_score('ZOE', 650)
+    save.close()
+
+    save = SQLiteSaveManager(path, profile='ZOE', background=False, json_path=str(tmp_path / "missing.json"))
+    assert save.db.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+    assert save.data['credits'] == 40
+    assert save.best_score() == 650
+    assert save.profiles() == ['ZOE']
+    save.close()
@@ -0,0 +1,97 @@
+import pygame
+from collections import OrderedDict
+from render_targets import new_surface, to_display_format
+
+# name -> (point size, bold)
+FONT_SPECS = {
+    'small': (18, False),
+    'large': (36, False),
+    'title': (64, True),
+    'label': (12, True),
+}
+
+class FontRegistry:
+    """
+    Every font the game uses, created once on first request. Uses the font
+    file bundled with pygame (the one SysFont falls back to when Arial is
+    missing, as in the browser) unless a font file is configured; SysFont
+    is avoided because its first call scans every installed font.
+    """
+    def __init__(self, font_name=None):
+        self.font_name = font_name
+        self.fonts = {}
+
+    def configure(self, font_name):
+        if font_name != self.font_name:
+            self.font_name = font_name
+            self.fonts = {}
+
+    def get(self, name):
+        font = self.fonts.get(name)
+        if font is None:
+            if not pygame.font.get_init():
+                pygame.font.init()
+            size, bold = FONT_SPECS[name]
+            if self.font_name is None:
+                font = pygame.font.Font(None, size)
+                font.set_bold(bold)
+            else:
+                font = pygame.font.Font(self.font_name, size)
+            self.fonts[name] = font
+        return font
+
+class TextCache:
+    """
+    LRU cache of rendered strings keyed by (text, font, color, shadow, alpha).
+    With `shadow` the surface holds the drop shadow offset by 2px under the text.
+    Surfaces are shared, so callers must not change them; a faded copy is
+    its own entry, made from the opaque one (callers should quantize `alpha`).
+    """
+    def __init__(self, fonts, max_entries=256):
+        self.fonts = fonts
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def render(self, text, font='small', color=(255, 255, 255), shadow=False, alpha=255):
+        key = (text, font, color, shadow, alpha)
+        surf = self.entries.get(key)
+        if surf is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return surf
+
+        self.misses += 1
+        if alpha < 255:
+            surf = self.render(text, font, color, shadow).copy()
+            surf.set_alpha(alpha)
+            return self._store(key, surf)
+        f = self.fonts.get(font)
+        surf = f.render(text, True, color)
+        if shadow:
+            # Simple drop shadow for readability
+            shadow_surf = f.render(text, True, (0, 0, 0, 128))
+            composed = new_surface((surf.get_width() + 2, surf.get_height() + 2), pygame.SRCALPHA)
+            composed.blit(shadow_surf, (2, 2))
+            composed.blit(surf, (0, 0))
+            surf = composed
+        return self._store(key, to_display_format(surf))
+
+    def _store(self, key, surf):
+        self.entries[key] = surf
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+        return surf
+
+    def clear(self):
+        self.entries.clear()
+
+    def stats(self):
+        return {'entries': len(self.entries), 'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions}
+
+# Shared so UI, floating texts and powerup labels reuse each other's renders
+fonts = FontRegistry()
+text_cache = TextCache(fonts)
@@ -1,24 +1,34 @@
 
 import pygame
+from text_cache import fonts, text_cache
+from render_targets import new_surface
 
 class UI:
     def __init__(self, font_name=None):
-        self.font_small = pygame.font.SysFont("arial", 18) if font_name is None else pygame.font.Font(font_name, 18)
-        self.font_large = pygame.font.SysFont("arial", 36) if font_name is None else pygame.font.Font(font_name, 36)
-        self.font_title = pygame.font.SysFont("arial", 64, bold=True) if font_name is None else pygame.font.Font(font_name, 64)
+        fonts.configure(font_name)
+        self.font_small = fonts.get('small')
+        self.font_large = fonts.get('large')
+        self.font_title = fonts.get('title')
+        self.flash_surf = None
+        self.panels = {}
 
     def draw_glass_panel(self, surface, rect, color=(255, 255, 255, 30), border_radius=15, border_color=(255, 255, 255, 100)):
         """
         Draws a rectangle with a glassmorphism effect.
         """
-        # Create a surface for the panel
-        panel_surf = pygame.Surface((rect.width, rect.height), pygame.SRCALPHA)
-        
-        # Draw the main semi-transparent fill
-        pygame.draw.rect(panel_surf, color, panel_surf.get_rect(), border_radius=border_radius)
-        
-        # Draw a subtle border/stroke to define edges (the "shine")
-        pygame.draw.rect(panel_surf, border_color, panel_surf.get_rect(), 2, border_radius=border_radius)
+        # Panels only come in a handful of shapes, so each is built once
+        key = (rect.width, rect.height, color, border_radius, border_color)
+        panel_surf = self.panels.get(key)
+        if panel_surf is None:
+            # Create a surface for the panel
+            panel_surf = new_surface((rect.width, rect.height), pygame.SRCALPHA)
+            
+            # Draw the main semi-transparent fill
+            pygame.draw.rect(panel_surf, color, panel_surf.get_rect(), border_radius=border_radius)
+            
+            # Draw a subtle border/stroke to define edges (the "shine")
+            pygame.draw.rect(panel_surf, border_color, panel_surf.get_rect(), 2, border_radius=border_radius)
+            self.panels[key] = panel_surf
         
         surface.blit(panel_surf, rect)
 
@@ -33,64 +43,71 @@ class UI:
             fill_rect = pygame.Rect(x, y, fill_width, height)
             
             # Create a glowy bar
-            bar_surf = pygame.Surface((fill_width, height), pygame.SRCALPHA)
+            bar_surf = new_surface((fill_width, height), pygame.SRCALPHA)
             pygame.draw.rect(bar_surf, (*color, 200), bar_surf.get_rect(), border_radius=5)
             surface.blit(bar_surf, (x, y))
 
     def draw_text(self, surface, text, x, y, center=False, font_type='small', color=(255, 255, 255)):
-        font = self.font_small
-        if font_type == 'large':
-            font = self.font_large
-        elif font_type == 'title':
-            font = self.font_title
+        if font_type not in ('large', 'title'):
+            font_type = 'small'
 
-        text_surf = font.render(text, True, color)
+        # Text and its drop shadow come pre-composed from the shared cache
+        text_surf = text_cache.render(text, font_type, color, shadow=True)
         
-        # Simple drop shadow for readability
-        shadow_surf = font.render(text, True, (0, 0, 0, 128))
-        
-        rect = text_surf.get_rect()
+        rect = pygame.Rect(0, 0, text_surf.get_width() - 2, text_surf.get_height() - 2)
         if center:
             rect.center = (x, y)
-            surface.blit(shadow_surf, (rect.x + 2, rect.y + 2))
-            surface.blit(text_surf, rect)
         else:
             rect.topleft = (x, y)
-            surface.blit(shadow_surf, (rect.x + 2, rect.y + 2))
-            surface.blit(text_surf, rect)
+        surface.blit(text_surf, rect.topleft)
 
     def draw_boss_health(self, surface, boss):
         if boss and boss.active:
-            screen_w = surface.get_width()
-            bar_w = 400
-            bar_h = 20
-            x = (screen_w - bar_w) // 2
-            y = 80
-            
-            self.draw_text(surface, "BOSS", screen_w // 2, y - 25, center=True, font_type='large', color=(255, 50, 50))
-            self.draw_bar(surface, x, y, bar_w, bar_h, boss.health, boss.max_health, color=(255, 50, 50))
+            self.draw_boss_bar(surface, boss.health, boss.max_health)
+
+    def draw_boss_bar(self, surface, health, max_health):
+        screen_w = surface.get_width()
+        bar_w = 400
+        bar_h = 20
+        x = (screen_w - bar_w) // 2
+        y = 80
+        
+        self.draw_text(surface, "BOSS", screen_w // 2, y - 25, center=True, font_type='large', color=(255, 50, 50))
+        self.draw_bar(surface, x, y, bar_w, bar_h, health, max_health, color=(255, 50, 50))
 
     def draw_hud(self, surface, player, level_manager, credits=0):
+        self.draw_score_panel(surface, player.score, level_manager.level)
+        self.draw_health_panel(surface, player.health, player.max_health)
+        self.draw_credits(surface, credits)
+        self.draw_emp(surface, player.emp_energy, player.emp_max_energy)
+
+    def draw_score_panel(self, surface, score, level):
         # Top Left: Score & Level
         panel_w, panel_h = 200, 80
         pad = 20
         self.draw_glass_panel(surface, pygame.Rect(pad, pad, panel_w, panel_h))
         
-        self.draw_text(surface, f"Score: {player.score}", pad + 15, pad + 15, font_type='small')
-        self.draw_text(surface, f"Level: {level_manager.level}", pad + 15, pad + 45, font_type='small')
+        self.draw_text(surface, f"Score: {score}", pad + 15, pad + 15, font_type='small')
+        self.draw_text(surface, f"Level: {level}", pad + 15, pad + 45, font_type='small')
 
+    def draw_health_panel(self, surface, health, max_health):
         # Top Right: Health
+        panel_h = 80
+        pad = 20
         health_panel_w = 220
         self.draw_glass_panel(surface, pygame.Rect(surface.get_width() - health_panel_w - pad, pad, health_panel_w, panel_h))
         self.draw_text(surface, "Health", surface.get_width() - health_panel_w - pad + 15, pad + 10, font_type='small')
-        self.draw_bar(surface, surface.get_width() - health_panel_w - pad + 15, pad + 40, 190, 20, player.health, player.max_health, color=(0, 200, 255))
-        
-        # Credits
+        self.draw_bar(surface, surface.get_width() - health_panel_w - pad + 15, pad + 40, 190, 20, health, max_health, color=(0, 200, 255))
+
+    def draw_credits(self, surface, credits):
+        pad = 20
         self.draw_text(surface, f"Credits: {credits}", surface.get_width() - pad - 110, pad + 90, center=False, font_type='small', color=(255, 215, 0))
-        
+
+    def draw_emp(self, surface, energy, max_energy):
         # EMP Bar
+        pad = 20
         self.draw_text(surface, "EMP", surface.get_width() - pad - 230, pad + 40, font_type='small')
-        self.draw_bar(surface, surface.get_width() - pad - 230, pad + 65, 100, 10, player.emp_energy, player.emp_max_energy, color=(0, 255, 255))
+        self.draw_bar(surface, surface.get_width() - pad - 230, pad + 65, 100, 10, energy, max_energy, color=(0, 255, 255))
 
     def draw_combo(self, surface, combo):
         if combo > 1:
@@ -147,14 +164,16 @@ class UI:
         return button_rects
 
     def draw_screen_flash(self, surface, color, alpha):
-        flash_surf = pygame.Surface((surface.get_width(), surface.get_height()))
-        flash_surf.set_alpha(alpha)
-        flash_surf.fill(color)
-        surface.blit(flash_surf, (0, 0))
+        # One flash surface is kept and refilled; the flash runs for many frames in a row
+        if self.flash_surf is None or self.flash_surf.get_size() != surface.get_size():
+            self.flash_surf = new_surface(surface.get_size())
+        self.flash_surf.set_alpha(alpha)
+        self.flash_surf.fill(color)
+        surface.blit(self.flash_surf, (0, 0))
 
     def draw_game_over(self, surface, score):
         w, h = surface.get_width(), surface.get_height()
-        overlay = pygame.Surface((w, h), pygame.SRCALPHA)
+        overlay = new_surface((w, h), pygame.SRCALPHA)
         overlay.fill((0, 0, 0, 200)) 
         surface.blit(overlay, (0, 0))
 